@@ -1,10 +1,88 @@
 # configs/topologies/Cluster3D_Hub.py
 
+from itertools import chain
+
 from m5.params import *
 from m5.objects import *
 
 from common import FileSystemConfig
 from topologies.BaseTopology import SimpleTopology
+from topologies._mesh_util import LinkSpec
+
+
+def _link_recipe(X, Y, Z, CS, link_latency, vlink_latency):
+    """Return every directed IntLink of a Cluster3D_Hub network as a tuple
+    of LinkSpec."""
+    N_HR = X * Y * Z
+
+    # ------- id -------
+    # HR[z][y][x] / HUB[z][cy][cx] -> router_id
+    HR = [
+        [[z * (X * Y) + y * X + x for x in range(X)] for y in range(Y)]
+        for z in range(Z)
+    ]
+    CX, CY = X // CS, Y // CS
+    HUB = [
+        [
+            [N_HR + (z * CY + cy) * CX + cx for cx in range(CX)]
+            for cy in range(CY)
+        ]
+        for z in range(Z)
+    ]
+    # HUB_OF[z][y][x] -> hub router_id owning HR (x, y, z)
+    HUB_OF = [
+        [[HUB[z][y // CS][x // CS] for x in range(X)] for y in range(Y)]
+        for z in range(Z)
+    ]
+
+    # (a -> b outport, a -> b inport, b -> a outport, b -> a inport)
+    EW = ("East", "West", "West", "East")
+    NS = ("North", "South", "South", "North")
+    HR_HUB = ("ToHub", "FromCluster", "ToCluster", "FromHub")
+    UD = ("Up", "Down", "Down", "Up")
+
+    def bidi(a, b, ports, lat, w):
+        fwd_out, fwd_in, rev_out, rev_in = ports
+        return (
+            LinkSpec(a, b, fwd_out, fwd_in, lat, w),
+            LinkSpec(b, a, rev_out, rev_in, lat, w),
+        )
+
+    # Links are emitted (and so numbered) in this order:
+    #   - the East/West and North/South HR mesh links of every layer
+    #   - the HR <-> Hub links of every layer
+    #   - the cross-layer Hub <-> Hub links
+    def mesh_links():
+        for z in range(Z):
+            for y in range(Y):
+                for x in range(X):
+                    u = HR[z][y][x]
+                    if x + 1 < X:
+                        v = HR[z][y][x + 1]
+                        yield from bidi(u, v, EW, link_latency, 1)
+                    if y + 1 < Y:
+                        v = HR[z][y + 1][x]
+                        yield from bidi(u, v, NS, link_latency, 2)
+
+    def hub_links():
+        for z in range(Z):
+            for y in range(Y):
+                for x in range(X):
+                    u = HR[z][y][x]
+                    yield from bidi(
+                        u, HUB_OF[z][y][x], HR_HUB, link_latency, 3
+                    )
+
+    def tsv_links():
+        for z in range(Z - 1):
+            for cy in range(CY):
+                for cx in range(CX):
+                    a = HUB[z][cy][cx]
+                    b = HUB[z + 1][cy][cx]
+                    yield from bidi(a, b, UD, vlink_latency, 4)
+
+    links = chain(mesh_links(), hub_links(), tsv_links())
+    return tuple(links)
 
 
 class Cluster3D_Hub(SimpleTopology):
@@ -34,10 +112,12 @@ class Cluster3D_Hub(SimpleTopology):
         assert Z > 0, "层数 Z 必须 > 0"
 
         # num of clusters per layer
+        assert self.CLUSTER_SIDE > 0, "簇边长必须 > 0"
         assert (
             X % self.CLUSTER_SIDE == 0 and Y % self.CLUSTER_SIDE == 0
         ), "X/Y 必须能被簇边长整除"
-        hubs_per_layer = (X // self.CLUSTER_SIDE) * (Y // self.CLUSTER_SIDE)
+        CX, CY = X // self.CLUSTER_SIDE, Y // self.CLUSTER_SIDE
+        hubs_per_layer = CX * CY
         N_HBR = Z * hubs_per_layer  # Hub Router
 
         # Link Latency
@@ -51,184 +131,58 @@ class Cluster3D_Hub(SimpleTopology):
         vlink_latency = max(1, int(link_latency) * tsv_slow // tsv_fast)
         hub_latency = max(1, router_latency // max(1, self.HUB_SPEEDUP))
 
-        # ------- id -------
-        def hr_id(x, y, z):
-            return z * (X * Y) + y * X + x
-
-        def hbr_id(cx, cy, z):
-
-            idx_in_layer = cy * (X // self.CLUSTER_SIDE) + cx
-            return N_HR + z * hubs_per_layer + idx_in_layer
+        # controllers -> HR; leftover controllers (index >= cutoff) must be
+        # DMA (on router 0)
+        cutoff = len(nodes) - len(nodes) % N_HR
+        assert all(
+            nodes[i].type == "DMA_Controller"
+            for i in range(cutoff, len(nodes))
+        )
 
         # ------- Add Routers -------
-        routers = []
-        for i in range(N_HR):
-            routers.append(Router(router_id=i, latency=router_latency))
-        for j in range(N_HBR):
-            routers.append(Router(router_id=N_HR + j, latency=hub_latency))
+        # HR: 0 .. N_HR-1, Hub: N_HR .. N_HR+N_HBR-1
+        hrs = [Router(latency=router_latency) for _ in range(N_HR)]
+        hubs = [Router(latency=hub_latency) for _ in range(N_HBR)]
+        routers = hrs + hubs
+        for i, r in enumerate(routers):
+            r.router_id = i
         network.routers = routers
+        # read-only view used for the link lookups below
+        R = tuple(routers)
 
         # ------- ExtLink -------
-        ext_links = []
-        link_id = 0
-        cntrls_per_router, remainder = divmod(len(nodes), N_HR)
-        network_nodes = nodes[: len(nodes) - remainder]
-        remainder_nodes = nodes[len(nodes) - remainder :]
-
-        for i, n in enumerate(network_nodes):
-            level, rid = divmod(i, N_HR)
-            assert level < cntrls_per_router
-            ext_links.append(
-                ExtLink(
-                    link_id=link_id,
-                    ext_node=n,
-                    int_node=routers[rid],
-                    latency=link_latency,
-                )
+        ext_links = [
+            ExtLink(
+                ext_node=n,
+                int_node=R[i % N_HR if i < cutoff else 0],
+                latency=link_latency,
             )
-            link_id += 1
-
-        for i, n in enumerate(remainder_nodes):
-            assert n.type == "DMA_Controller" and i < remainder
-            ext_links.append(
-                ExtLink(
-                    link_id=link_id,
-                    ext_node=n,
-                    int_node=routers[0],
-                    latency=link_latency,
-                )
-            )
-            link_id += 1
+            for i, n in enumerate(nodes)
+        ]
 
         network.ext_links = ext_links
 
         # ------- IntLink -------
-        int_links = []
-
-        for z in range(Z):
-            for y in range(Y):
-                for x in range(X):
-                    u = hr_id(x, y, z)
-                    if x + 1 < X:
-                        v = hr_id(x + 1, y, z)
-                        # u -> v (East), v -> u (West)
-                        int_links.append(
-                            IntLink(
-                                link_id=link_id,
-                                src_node=routers[u],
-                                dst_node=routers[v],
-                                src_outport="East",
-                                dst_inport="West",
-                                latency=link_latency,
-                                weight=1,
-                            )
-                        )
-                        link_id += 1
-                        int_links.append(
-                            IntLink(
-                                link_id=link_id,
-                                src_node=routers[v],
-                                dst_node=routers[u],
-                                src_outport="West",
-                                dst_inport="East",
-                                latency=link_latency,
-                                weight=1,
-                            )
-                        )
-                        link_id += 1
-                    if y + 1 < Y:
-                        v = hr_id(x, y + 1, z)
-                        # u -> v (North), v -> u (South)
-                        int_links.append(
-                            IntLink(
-                                link_id=link_id,
-                                src_node=routers[u],
-                                dst_node=routers[v],
-                                src_outport="North",
-                                dst_inport="South",
-                                latency=link_latency,
-                                weight=2,
-                            )
-                        )
-                        link_id += 1
-                        int_links.append(
-                            IntLink(
-                                link_id=link_id,
-                                src_node=routers[v],
-                                dst_node=routers[u],
-                                src_outport="South",
-                                dst_inport="North",
-                                latency=link_latency,
-                                weight=2,
-                            )
-                        )
-                        link_id += 1
-
-        for z in range(Z):
-            for y in range(Y):
-                for x in range(X):
-                    cx, cy = x // self.CLUSTER_SIDE, y // self.CLUSTER_SIDE
-                    hub = hbr_id(cx, cy, z)
-                    h = hr_id(x, y, z)
-                    int_links.append(
-                        IntLink(
-                            link_id=link_id,
-                            src_node=routers[h],
-                            dst_node=routers[hub],
-                            src_outport="ToHub",
-                            dst_inport="FromCluster",
-                            latency=link_latency,
-                            weight=3,
-                        )
-                    )
-                    link_id += 1
-                    int_links.append(
-                        IntLink(
-                            link_id=link_id,
-                            src_node=routers[hub],
-                            dst_node=routers[h],
-                            src_outport="ToCluster",
-                            dst_inport="FromHub",
-                            latency=link_latency,
-                            weight=3,
-                        )
-                    )
-                    link_id += 1
-
-        for z in range(Z - 1):
-            for cy in range(Y // self.CLUSTER_SIDE):
-                for cx in range(X // self.CLUSTER_SIDE):
-                    a = hbr_id(cx, cy, z)
-                    b = hbr_id(cx, cy, z + 1)
-                    # a -> b : Up
-                    int_links.append(
-                        IntLink(
-                            link_id=link_id,
-                            src_node=routers[a],
-                            dst_node=routers[b],
-                            src_outport="Up",
-                            dst_inport="Down",
-                            latency=vlink_latency,
-                            weight=4,
-                        )
-                    )
-                    link_id += 1
-                    # b -> a : Down
-                    int_links.append(
-                        IntLink(
-                            link_id=link_id,
-                            src_node=routers[b],
-                            dst_node=routers[a],
-                            src_outport="Down",
-                            dst_inport="Up",
-                            latency=vlink_latency,
-                            weight=4,
-                        )
-                    )
-                    link_id += 1
-
+        recipe = _link_recipe(
+            X, Y, Z, self.CLUSTER_SIDE, link_latency, vlink_latency
+        )
+        int_links = [
+            IntLink(
+                src_node=R[r.src],
+                dst_node=R[r.dst],
+                src_outport=r.src_outport,
+                dst_inport=r.dst_inport,
+                latency=r.latency,
+                weight=r.weight,
+            )
+            for r in recipe
+        ]
         network.int_links = int_links
 
+        # link_id is assigned in one pass once every link exists
+        for i, l in enumerate(ext_links + int_links):
+            l.link_id = i
+
     def registerTopology(self, options):
         for i in range(options.num_cpus):
             FileSystemConfig.register_node(
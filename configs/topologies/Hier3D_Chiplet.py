@@ -3,7 +3,16 @@ from m5.objects import *
 
 from common import FileSystemConfig
 from topologies.BaseTopology import SimpleTopology
-
+from topologies._hier3d_core import (
+    EW_PORTS,
+    NS_PORTS,
+    UD_PORTS,
+    add_bidi,
+    chiplet_pairs,
+    ext_router_ids,
+    id_grid,
+    stencil_pairs,
+)
 
 # =========================
 # ===== configs ======
@@ -27,17 +36,126 @@ W_VERTICAL = 3
 # =========================
 
 
+def _compute_specs(
+    num_nodes,
+    X,
+    Y,
+    Z,
+    CHIP_X,
+    CHIP_Y,
+    CHIP_Z,
+    GW_PER_CHIPLET,
+    link_latency,
+    vlink_latency,
+):
+    """Return (ext_ids, int_specs): the router id of every controller and
+    every IntLink as (src_id, dst_id, src_port, dst_port, latency, weight).
+    """
+    ext_ids = tuple(ext_router_ids(num_nodes, X * Y * Z))
+
+    CX = X // CHIP_X
+    CY = Y // CHIP_Y
+    CZ = Z // CHIP_Z  # chiplet layer num
+
+    # RID[z][y][x] -> router_id
+    RID = id_grid(X, Y, Z)
+
+    # gw_x[cz][cy][cx] / gw_y[cz][cy][cx] -> router_id of the chiplet's
+    # X / Y backbone gateway (the same router when GW_PER_CHIPLET == 1)
+    gw_x = [[[0] * CX for _ in range(CY)] for _ in range(CZ)]
+    gw_y = [[[0] * CX for _ in range(CY)] for _ in range(CZ)]
+
+    def choose_one_gateway(x0, y0, z0):
+
+        gx = min(x0 + CHIP_X // 2, x0 + CHIP_X - 1)
+        gy = min(y0 + CHIP_Y // 2, y0 + CHIP_Y - 1)
+        gz = min(z0 + CHIP_Z // 2, z0 + CHIP_Z - 1)
+        return (gx, gy, gz)
+
+    def choose_two_gateways(x0, y0, z0):
+
+        gx0 = x0
+        gy0 = min(y0 + CHIP_Y // 2, y0 + CHIP_Y - 1)
+        gz0 = min(z0 + CHIP_Z // 2, z0 + CHIP_Z - 1)
+
+        gx1 = min(x0 + CHIP_X // 2, x0 + CHIP_X - 1)
+        gy1 = y0
+        gz1 = gz0
+        return (gx0, gy0, gz0), (gx1, gy1, gz1)
+
+    for cz in range(CZ):
+        for cy in range(CY):
+            for cx in range(CX):
+                x0 = cx * CHIP_X
+                y0 = cy * CHIP_Y
+                z0 = cz * CHIP_Z
+                if GW_PER_CHIPLET == 1:
+                    gx, gy, gz = choose_one_gateway(x0, y0, z0)
+                    gw = RID[gz][gy][gx]
+                    gw_x[cz][cy][cx] = gw
+                    gw_y[cz][cy][cx] = gw
+                else:
+                    (gx0, gy0, gz0), (gx1, gy1, gz1) = choose_two_gateways(
+                        x0, y0, z0
+                    )
+                    gw_x[cz][cy][cx] = RID[gz0][gy0][gx0]
+                    gw_y[cz][cy][cx] = RID[gz1][gy1][gx1]
+
+    # ------------- IntLink-------------
+    # (src_id, dst_id, src_port, dst_port, latency, weight)
+    specs = []
+
+    # Intra-chiplet mesh
+    axis_links = (
+        (EW_PORTS, link_latency),
+        (NS_PORTS, link_latency),
+        (UD_PORTS, vlink_latency),
+    )
+    for a, b, axis in chiplet_pairs(RID, CHIP_X, CHIP_Y, CHIP_Z):
+        ports, lat = axis_links[axis]
+        add_bidi(specs, ((a, b),), ports, lat, W_INTRA)
+
+    # Chiplet backbone: X/Z along the X gateways, Y along the Y gateways
+    gw_x_pairs, _, gw_z_pairs = stencil_pairs(gw_x)
+    _, gw_y_pairs, _ = stencil_pairs(gw_y)
+
+    #   X  chiplet
+    add_bidi(
+        specs,
+        gw_x_pairs,
+        ("EastGW", "WestGW", "WestGW", "EastGW"),
+        link_latency,
+        W_BACKBONE,
+    )
+
+    #   Y  chiplet
+    add_bidi(
+        specs,
+        gw_y_pairs,
+        ("NorthGW", "SouthGW", "SouthGW", "NorthGW"),
+        link_latency,
+        W_BACKBONE,
+    )
+
+    #   Z  chiplet (only when there is more than one chiplet layer)
+    if CZ > 1:
+        add_bidi(
+            specs,
+            gw_z_pairs,
+            ("UpGW", "DownGW", "DownGW", "UpGW"),
+            vlink_latency,
+            W_VERTICAL,
+        )
+
+    return ext_ids, tuple(specs)
+
+
 class Hier3D_Chiplet(SimpleTopology):
     description = "Hier3D_Chiplet"
 
     def __init__(self, controllers):
         self.nodes = controllers
 
-    # Helper: coordinate and router_id
-    @staticmethod
-    def _rid(x, y, z, X, Y):
-        return z * (X * Y) + y * X + x
-
     def makeTopology(self, options, network, IntLink, ExtLink, Router):
         nodes = self.nodes
 
@@ -56,180 +174,61 @@ class Hier3D_Chiplet(SimpleTopology):
         router_latency = int(options.router_latency)
         tsv_slowdown = max(1, int(getattr(options, "tsv_slowdown", 4)))
         tsv_speedup = max(1, int(getattr(options, "tsv_speedup", 1)))
-        vlink_latency = max(1, int(link_latency) * tsv_slowdown // tsv_speedup)
+        vlink_latency = max(1, link_latency * tsv_slowdown // tsv_speedup)
 
         routers = [
             Router(router_id=i, latency=router_latency)
             for i in range(num_routers)
         ]
         network.routers = routers
-
-        link_count = 0
-        cntrls_per_router, remainder = divmod(len(nodes), num_routers)
-        ext_links = []
-        for (i, n) in enumerate(nodes[: len(nodes) - remainder]):
-            cntrl_level, r_id = divmod(i, num_routers)
-            assert cntrl_level < cntrls_per_router
-            ext_links.append(
-                ExtLink(
-                    link_id=link_count,
-                    ext_node=n,
-                    int_node=routers[r_id],
-                    latency=link_latency,
-                )
-            )
-            link_count += 1
-
-        for (i, n) in enumerate(nodes[len(nodes) - remainder :]):
-            ext_links.append(
-                ExtLink(
-                    link_id=link_count,
-                    ext_node=n,
-                    int_node=routers[0],
-                    latency=link_latency,
-                )
-            )
-            link_count += 1
-
-        network.ext_links = ext_links
+        # read-only view used for the link lookups below
+        R = tuple(routers)
 
         assert (
             X % CHIP_X == 0 and Y % CHIP_Y == 0 and Z % CHIP_Z == 0
         ), "Global dims (X,Y,Z) must be divisible by chiplet dims (CHIP_X,CHIP_Y,CHIP_Z)"
 
-        CX = X // CHIP_X
-        CY = Y // CHIP_Y
-        CZ = Z // CHIP_Z  # chiplet layer num
-
-        gw_x_map = {}
-        gw_y_map = {}
-
-        def choose_one_gateway(x0, y0, z0):
-
-            gx = min(x0 + CHIP_X // 2, x0 + CHIP_X - 1)
-            gy = min(y0 + CHIP_Y // 2, y0 + CHIP_Y - 1)
-            gz = min(z0 + CHIP_Z // 2, z0 + CHIP_Z - 1)
-            return (gx, gy, gz)
-
-        def choose_two_gateways(x0, y0, z0):
-
-            gx0 = x0
-            gy0 = min(y0 + CHIP_Y // 2, y0 + CHIP_Y - 1)
-            gz0 = min(z0 + CHIP_Z // 2, z0 + CHIP_Z - 1)
-
-            gx1 = min(x0 + CHIP_X // 2, x0 + CHIP_X - 1)
-            gy1 = y0
-            gz1 = gz0
-            return (gx0, gy0, gz0), (gx1, gy1, gz1)
-
-        for cz in range(CZ):
-            for cy in range(CY):
-                for cx in range(CX):
-                    x0 = cx * CHIP_X
-                    y0 = cy * CHIP_Y
-                    z0 = cz * CHIP_Z
-                    if GW_PER_CHIPLET == 1:
-                        gx, gy, gz = choose_one_gateway(x0, y0, z0)
-                        gw_x_map[(cx, cy, cz)] = (gx, gy, gz)
-                        gw_y_map[(cx, cy, cz)] = (gx, gy, gz)
-                    else:
-                        (gx0, gy0, gz0), (gx1, gy1, gz1) = choose_two_gateways(
-                            x0, y0, z0
-                        )
-                        gw_x_map[(cx, cy, cz)] = (gx0, gy0, gz0)  # X
-                        gw_y_map[(cx, cy, cz)] = (gx1, gy1, gz1)  # Y
-
-        # ------------- IntLink-------------
-        int_links = []
-
-        def add_link(src_id, dst_id, src_port, dst_port, w):
-            nonlocal link_count
-            lat = (
-                vlink_latency
-                if (
-                    ("Up" in src_port)
-                    or ("Down" in src_port)
-                    or ("Up" in dst_port)
-                    or ("Down" in dst_port)
-                )
-                else link_latency
-            )
-            int_links.append(
-                IntLink(
-                    link_id=link_count,
-                    src_node=routers[src_id],
-                    dst_node=routers[dst_id],
-                    src_outport=src_port,
-                    dst_inport=dst_port,
-                    latency=lat,
-                    weight=w,
-                )
+        ext_ids, specs = _compute_specs(
+            len(nodes),
+            X,
+            Y,
+            Z,
+            CHIP_X,
+            CHIP_Y,
+            CHIP_Z,
+            GW_PER_CHIPLET,
+            link_latency,
+            vlink_latency,
+        )
+
+        # controllers are spread uniformly over the routers, the remainder
+        # (DMA) goes to router 0
+        ext_links = [
+            ExtLink(
+                link_id=i,
+                ext_node=n,
+                int_node=R[r_id],
+                latency=link_latency,
             )
-            link_count += 1
-
-        for z in range(Z):
-            # chiplet
-            cz = z // CHIP_Z
-            for y in range(Y):
-                cy = y // CHIP_Y
-                for x in range(X):
-                    cx = x // CHIP_X
-
-                    # East-West
-                    if (x + 1 < X) and ((x + 1) // CHIP_X == cx):
-                        a = self._rid(x, y, z, X, Y)
-                        b = self._rid(x + 1, y, z, X, Y)
-                        add_link(a, b, "East", "West", W_INTRA)
-                        add_link(b, a, "West", "East", W_INTRA)
-
-                    # North-South
-                    if (y + 1 < Y) and ((y + 1) // CHIP_Y == cy):
-                        a = self._rid(x, y, z, X, Y)
-                        b = self._rid(x, y + 1, z, X, Y)
-                        add_link(a, b, "North", "South", W_INTRA)
-                        add_link(b, a, "South", "North", W_INTRA)
-
-                    # Up-Down
-                    if (z + 1 < Z) and ((z + 1) // CHIP_Z == cz):
-                        a = self._rid(x, y, z, X, Y)
-                        b = self._rid(x, y, z + 1, X, Y)
-                        add_link(a, b, "Up", "Down", W_INTRA)
-                        add_link(b, a, "Down", "Up", W_INTRA)
-
-        #   X  chiplet
-        for cz in range(CZ):
-            for cy in range(CY):
-                for cx in range(CX - 1):
-                    gx0, gy0, gz0 = gw_x_map[(cx, cy, cz)]
-                    gx1, gy1, gz1 = gw_x_map[(cx + 1, cy, cz)]
-                    a = self._rid(gx0, gy0, gz0, X, Y)
-                    b = self._rid(gx1, gy1, gz1, X, Y)
-                    add_link(a, b, "EastGW", "WestGW", W_BACKBONE)
-                    add_link(b, a, "WestGW", "EastGW", W_BACKBONE)
-
-        #   Y  chiplet
-        for cz in range(CZ):
-            for cy in range(CY - 1):
-                for cx in range(CX):
-                    gx0, gy0, gz0 = gw_y_map[(cx, cy, cz)]
-                    gx1, gy1, gz1 = gw_y_map[(cx, cy + 1, cz)]
-                    a = self._rid(gx0, gy0, gz0, X, Y)
-                    b = self._rid(gx1, gy1, gz1, X, Y)
-                    add_link(a, b, "NorthGW", "SouthGW", W_BACKBONE)
-                    add_link(b, a, "SouthGW", "NorthGW", W_BACKBONE)
-
-        #   Z  chiplet
-
-        for cz in range(CZ - 1):
-            for cy in range(CY):
-                for cx in range(CX):
-                    gx0, gy0, gz0 = gw_x_map[(cx, cy, cz)]
-                    gx1, gy1, gz1 = gw_x_map[(cx, cy, cz + 1)]
-                    a = self._rid(gx0, gy0, gz0, X, Y)
-                    b = self._rid(gx1, gy1, gz1, X, Y)
-                    add_link(a, b, "UpGW", "DownGW", W_VERTICAL)
-                    add_link(b, a, "DownGW", "UpGW", W_VERTICAL)
+            for i, (n, r_id) in enumerate(zip(nodes, ext_ids))
+        ]
+        link_count = len(ext_links)
+        network.ext_links = ext_links
 
+        int_links = [
+            IntLink(
+                link_id=i,
+                src_node=R[src_id],
+                dst_node=R[dst_id],
+                src_outport=src_port,
+                dst_inport=dst_port,
+                latency=lat,
+                weight=w,
+            )
+            for i, (src_id, dst_id, src_port, dst_port, lat, w) in enumerate(
+                specs, start=link_count
+            )
+        ]
         network.int_links = int_links
 
     def registerTopology(self, options):
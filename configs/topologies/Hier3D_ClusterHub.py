@@ -5,6 +5,15 @@ from m5.objects import *
 
 from common import FileSystemConfig
 from topologies.BaseTopology import SimpleTopology
+from topologies._hier3d_core import (
+    EW_PORTS,
+    NS_PORTS,
+    UD_PORTS,
+    add_bidi,
+    ext_router_ids,
+    id_grid,
+    stencil_pairs,
+)
 
 
 class Hier3D_ClusterHub(SimpleTopology):
@@ -54,16 +63,13 @@ class Hier3D_ClusterHub(SimpleTopology):
         # TSV controls for vertical (Z) links
         tsv_slow = max(1, int(getattr(options, "tsv_slowdown", 4)))
         tsv_fast = max(1, int(getattr(options, "tsv_speedup", 1)))
-        vlink_latency = max(1, int(link_latency) * tsv_slow // tsv_fast)
+        vlink_latency = max(1, link_latency * tsv_slow // tsv_fast)
 
         hub_latency = max(1, router_latency // max(1, self.HUB_SPEEDUP))
 
-        # ID helpers: first N_HR are HRs, then hubs
-        def hr_id(x, y, z):
-            return z * (X * Y) + y * X + x
-
-        def hub_id(cx, cy, z):
-            return N_HR + z * (CX * CY) + cy * CX + cx
+        # ID tables: first N_HR are HRs (router_id = z*X*Y + y*X + x),
+        # then hubs. HUB[z][cy][cx] -> router_id
+        HUB = id_grid(CX, CY, Z, base=N_HR)
 
         # Create routers: HRs with router_latency, HBRs with hub_latency
         routers = []
@@ -72,176 +78,92 @@ class Hier3D_ClusterHub(SimpleTopology):
         for j in range(N_HBR):
             routers.append(Router(router_id=N_HR + j, latency=hub_latency))
         network.routers = routers
+        # read-only view used for the link lookups below
+        R = tuple(routers)
 
         # External links: map controllers uniformly to HRs; remainder to router 0 (DMA)
-        ext_links = []
-        link_id = 0
-        cntrls_per_router, remainder = divmod(len(nodes), N_HR)
-        network_nodes = nodes[: len(nodes) - remainder]
-        remainder_nodes = nodes[len(nodes) - remainder :]
-
-        for i, n in enumerate(network_nodes):
-            level, rid = divmod(i, N_HR)
-            assert level < cntrls_per_router
-            ext_links.append(
-                ExtLink(
-                    link_id=link_id,
-                    ext_node=n,
-                    int_node=routers[rid],
-                    latency=link_latency,
-                )
+        boundary = len(nodes) - len(nodes) % N_HR
+        assert all(n.type == "DMA_Controller" for n in nodes[boundary:])
+        ext_links = [
+            ExtLink(
+                link_id=i,
+                ext_node=n,
+                int_node=R[rid],
+                latency=link_latency,
             )
-            link_id += 1
-
-        for i, n in enumerate(remainder_nodes):
-            assert n.type == "DMA_Controller" and i < remainder
-            ext_links.append(
-                ExtLink(
-                    link_id=link_id,
-                    ext_node=n,
-                    int_node=routers[0],
-                    latency=link_latency,
-                )
+            for i, (n, rid) in enumerate(
+                zip(nodes, ext_router_ids(len(nodes), N_HR))
             )
-            link_id += 1
-
+        ]
+        link_id = len(ext_links)
         network.ext_links = ext_links
 
-        int_links = []
+        # (src_id, dst_id, src_port, dst_port, latency, weight)
+        specs = []
 
         # Weights for DOR-friendly ordering on the hub backbone
         WX, WY, WZ = 1, 2, 3
 
         # (A) HR <-> HBR: star within each 2x2 cluster (bidirectional)
         #     Weight = 1 (local egress/ingress to hub)
-        for z in range(Z):
-            for y in range(Y):
-                for x in range(X):
-                    cx, cy = x // self.CLUSTER_SIDE, y // self.CLUSTER_SIDE
-                    h = hr_id(x, y, z)
-                    hub = hub_id(cx, cy, z)
-                    int_links.append(
-                        IntLink(
-                            link_id=link_id,
-                            src_node=routers[h],
-                            dst_node=routers[hub],
-                            src_outport="ToHub",
-                            dst_inport="FromCluster",
-                            latency=link_latency,
-                            weight=1,
-                        )
-                    )
-                    link_id += 1
-                    int_links.append(
-                        IntLink(
-                            link_id=link_id,
-                            src_node=routers[hub],
-                            dst_node=routers[h],
-                            src_outport="ToCluster",
-                            dst_inport="FromHub",
-                            latency=link_latency,
-                            weight=1,
-                        )
-                    )
-                    link_id += 1
+        # hub_per_hr[h] -> hub router_id owning HR h
+        CS = self.CLUSTER_SIDE
+        hub_per_hr = [
+            HUB[z][y // CS][x // CS]
+            for z in range(Z)
+            for y in range(Y)
+            for x in range(X)
+        ]
+        add_bidi(
+            specs,
+            enumerate(hub_per_hr),
+            ("ToHub", "FromCluster", "ToCluster", "FromHub"),
+            link_latency,
+            1,
+        )
 
         # (B) HBR <-> HBR: 3D mesh among hubs (only hubs connect horizontally/vertically)
+        # X pairs row by row, Y pairs column by column and Z pairs pillar
+        # by pillar, which fixes the link_id of every backbone link
+        x_pairs, _, _ = stencil_pairs(HUB)
+        y_pairs = [
+            (HUB[z][cy][cx], HUB[z][cy + 1][cx])
+            for z in range(Z)
+            for cx in range(CX)
+            for cy in range(CY - 1)
+        ]
+        z_pairs = [
+            (HUB[z][cy][cx], HUB[z + 1][cy][cx])
+            for cy in range(CY)
+            for cx in range(CX)
+            for z in range(Z - 1)
+        ]
+
         # X dimension (East/West): weight=WX, latency=link_latency
-        for z in range(Z):
-            for cy in range(CY):
-                for cx in range(CX - 1):
-                    a = hub_id(cx, cy, z)
-                    b = hub_id(cx + 1, cy, z)
-                    # a -> b (East), b -> a (West)
-                    int_links.append(
-                        IntLink(
-                            link_id=link_id,
-                            src_node=routers[a],
-                            dst_node=routers[b],
-                            src_outport="East",
-                            dst_inport="West",
-                            latency=link_latency,
-                            weight=WX,
-                        )
-                    )
-                    link_id += 1
-                    int_links.append(
-                        IntLink(
-                            link_id=link_id,
-                            src_node=routers[b],
-                            dst_node=routers[a],
-                            src_outport="West",
-                            dst_inport="East",
-                            latency=link_latency,
-                            weight=WX,
-                        )
-                    )
-                    link_id += 1
+        add_bidi(specs, x_pairs, EW_PORTS, link_latency, WX)
 
         # Y dimension (North/South): weight=WY, latency=link_latency
-        for z in range(Z):
-            for cx in range(CX):
-                for cy in range(CY - 1):
-                    a = hub_id(cx, cy, z)
-                    b = hub_id(cx, cy + 1, z)
-                    # a -> b (North), b -> a (South)
-                    int_links.append(
-                        IntLink(
-                            link_id=link_id,
-                            src_node=routers[a],
-                            dst_node=routers[b],
-                            src_outport="North",
-                            dst_inport="South",
-                            latency=link_latency,
-                            weight=WY,
-                        )
-                    )
-                    link_id += 1
-                    int_links.append(
-                        IntLink(
-                            link_id=link_id,
-                            src_node=routers[b],
-                            dst_node=routers[a],
-                            src_outport="South",
-                            dst_inport="North",
-                            latency=link_latency,
-                            weight=WY,
-                        )
-                    )
-                    link_id += 1
+        add_bidi(specs, y_pairs, NS_PORTS, link_latency, WY)
 
         # Z dimension (Up/Down): weight=WZ, latency=vlink_latency
-        for cy in range(CY):
-            for cx in range(CX):
-                for z in range(Z - 1):
-                    a = hub_id(cx, cy, z)
-                    b = hub_id(cx, cy, z + 1)
-                    # a -> b (Up), b -> a (Down)
-                    int_links.append(
-                        IntLink(
-                            link_id=link_id,
-                            src_node=routers[a],
-                            dst_node=routers[b],
-                            src_outport="Up",
-                            dst_inport="Down",
-                            latency=vlink_latency,
-                            weight=WZ,
-                        )
-                    )
-                    link_id += 1
-                    int_links.append(
-                        IntLink(
-                            link_id=link_id,
-                            src_node=routers[b],
-                            dst_node=routers[a],
-                            src_outport="Down",
-                            dst_inport="Up",
-                            latency=vlink_latency,
-                            weight=WZ,
-                        )
-                    )
-                    link_id += 1
-
+        # (a flat Z == 1 network has no Up/Down links)
+        if Z > 1:
+            add_bidi(specs, z_pairs, UD_PORTS, vlink_latency, WZ)
+
+        int_links = [
+            IntLink(
+                link_id=i,
+                src_node=R[src_id],
+                dst_node=R[dst_id],
+                src_outport=src_port,
+                dst_inport=dst_port,
+                latency=lat,
+                weight=w,
+            )
+            for i, (src_id, dst_id, src_port, dst_port, lat, w) in enumerate(
+                specs, start=link_id
+            )
+        ]
         network.int_links = int_links
 
     # Register nodes with filesystem
@@ -5,6 +5,70 @@ from m5.objects import *
 
 from common import FileSystemConfig
 from topologies.BaseTopology import SimpleTopology
+from topologies._mesh_util import (
+    AXIS_PORTS,
+    LinkSpec,
+    axis_pairs,
+    build_ext_links,
+)
+
+
+def _plan_links(
+    X, Y, Z, PX, PY, LAYOUT_MODE, weights, link_latency, vlink_latency
+):
+    """Every IntLink as a LinkSpec; weights is
+    ((WXP, WXN), (WYP, WYN), (WZP, WZN))."""
+    (WXP, WXN), (WYP, WYN), (WZP, WZN) = weights
+
+    # rid[z][y][x] -> router_id
+    rid = [
+        [[z * (X * Y) + y * X + x for x in range(X)] for y in range(Y)]
+        for z in range(Z)
+    ]
+
+    specs = []
+
+    EW, NS, UD = AXIS_PORTS
+
+    # a -> b : fwd_out / fwd_in, b -> a : fwd_in / fwd_out
+    def add_bidir(a, b, ports, lat, w_ab, w_ba):
+        fwd_out, fwd_in = ports
+        specs.append(LinkSpec(a, b, fwd_out, fwd_in, lat, w_ab))
+        specs.append(LinkSpec(b, a, fwd_in, fwd_out, lat, w_ba))
+
+    # (a, b) id pairs of the +X / +Y edges come straight from id ranges
+    x_pairs = axis_pairs(X, Y, Z, 0)
+    y_pairs = axis_pairs(X, Y, Z, 1)
+
+    for a, b in x_pairs:
+        add_bidir(a, b, EW, link_latency, WXP, WXN)
+
+    for a, b in y_pairs:
+        add_bidir(a, b, NS, link_latency, WYP, WYN)
+
+    if LAYOUT_MODE not in ("aligned", "staggered"):
+        raise ValueError(f"Invalid layout specified: {LAYOUT_MODE}")
+
+    # Pillars sit every PX / PY routers; the staggered layout shifts
+    # the pillars of odd layers by half a pitch. Both pillar sets are
+    # fixed by the config, so they are listed once, in (y, x) order.
+    pillars_even = [(x, y) for y in range(0, Y, PY) for x in range(0, X, PX)]
+    if LAYOUT_MODE == "staggered":
+        pillars_odd = [
+            (x, y)
+            for y in range(PY // 2, Y, PY)
+            for x in range(PX // 2, X, PX)
+        ]
+    else:
+        pillars_odd = pillars_even
+
+    for z in range(Z - 1):
+        for x, y in pillars_odd if z % 2 else pillars_even:
+            a = rid[z][y][x]
+            b = rid[z + 1][y][x]
+            add_bidir(a, b, UD, vlink_latency, WZN, WZP)
+
+    return tuple(specs)
 
 
 class Sparse3D_Pillars(SimpleTopology):
@@ -41,25 +105,6 @@ class Sparse3D_Pillars(SimpleTopology):
                 PX % 2 == 0 and PY % 2 == 0
             ), "Staggered layout requires even spacing"
 
-        def _is_pillar_xy(x, y):
-            return (x % max(1, PX) == 0) and (y % max(1, PY) == 0)
-
-        def _idx(x, y, z):
-            return z * (X * Y) + y * X + x
-
-        def nearest_pillar_xy(x, y):
-
-            px = round(x / PX) * PX
-            py = round(y / PY) * PY
-
-            px = max(0, min(X - 1, px))
-            py = max(0, min(Y - 1, py))
-            return px, py
-
-        def dist_to_pillar(x, y):
-            px, py = nearest_pillar_xy(x, y)
-            return abs(x - px) + abs(y - py)
-
         # ----- Link Latencies -----
         link_latency = options.link_latency
 
@@ -69,176 +114,47 @@ class Sparse3D_Pillars(SimpleTopology):
         router_latency = options.router_latency
 
         # ----- Router Creation -----
-        cntrls_per_router, remainder = divmod(len(nodes), num_routers)
-
         routers = [
             Router(router_id=i, latency=router_latency)
             for i in range(num_routers)
         ]
         network.routers = routers
 
-        link_count = 0
-
         # ----- External Links -----
-
-        network_nodes = []
-        remainder_nodes = []
-        for node_index in range(len(nodes)):
-            if node_index < (len(nodes) - remainder):
-                network_nodes.append(nodes[node_index])
-            else:
-                remainder_nodes.append(nodes[node_index])
-
-        # Connect external nodes (CPUs, etc.) to routers
-        ext_links = []
-        for (i, n) in enumerate(network_nodes):
-            cntrl_level, router_id = divmod(i, num_routers)
-            assert cntrl_level < cntrls_per_router
-            ext_links.append(
-                ExtLink(
-                    link_id=link_count,
-                    ext_node=n,
-                    int_node=routers[router_id],
-                    latency=link_latency,
-                )
-            )
-            link_count += 1
-
-        # Connect the remaining nodes to router 0. These should only be DMA nodes.
-        for (i, node) in enumerate(remainder_nodes):
-            assert node.type == "DMA_Controller"
-            assert i < remainder
-            ext_links.append(
-                ExtLink(
-                    link_id=link_count,
-                    ext_node=node,
-                    int_node=routers[0],
-                    latency=link_latency,
-                )
-            )
-            link_count += 1
-
+        # Controllers go round-robin over the routers; the leftover ones
+        # should only be DMA nodes and go to router 0.
+        ext_links, link_count = build_ext_links(
+            ExtLink, nodes, routers, num_routers, link_latency
+        )
         network.ext_links = ext_links
 
         # ----- Internal Links -----
-        int_links = []
-
-        for z in range(Z):
-            for y in range(Y):
-                for x in range(X - 1):
-                    a = _idx(x, y, z)
-                    b = _idx(x + 1, y, z)
-
-                    int_links.append(
-                        IntLink(
-                            link_id=link_count,
-                            src_node=routers[a],
-                            dst_node=routers[b],
-                            src_outport="East",
-                            dst_inport="West",
-                            latency=link_latency,
-                            weight=WXP,
-                        )
-                    )
-                    link_count += 1
-                    int_links.append(
-                        IntLink(
-                            link_id=link_count,
-                            src_node=routers[b],
-                            dst_node=routers[a],
-                            src_outport="West",
-                            dst_inport="East",
-                            latency=link_latency,
-                            weight=WXN,
-                        )
-                    )
-                    link_count += 1
-
-        for z in range(Z):
-            for x in range(X):
-                for y in range(Y - 1):
-                    a = _idx(x, y, z)
-                    b = _idx(x, y + 1, z)
-                    # w_ab = W_TOWARD if dist_to_pillar(x, y + 1) < dist_to_pillar(x, y) else W_AWAY
-                    # w_ba = W_TOWARD if dist_to_pillar(x, y) < dist_to_pillar(x, y + 1) else W_AWAY
-                    int_links.append(
-                        IntLink(
-                            link_id=link_count,
-                            src_node=routers[a],
-                            dst_node=routers[b],
-                            src_outport="North",
-                            dst_inport="South",
-                            latency=link_latency,
-                            weight=WYP,
-                        )
-                    )
-                    link_count += 1
-                    int_links.append(
-                        IntLink(
-                            link_id=link_count,
-                            src_node=routers[b],
-                            dst_node=routers[a],
-                            src_outport="South",
-                            dst_inport="North",
-                            latency=link_latency,
-                            weight=WYN,
-                        )
-                    )
-                    link_count += 1
-
-        int_links_z = []
-        for z in range(Z - 1):
-            for y in range(Y):
-                for x in range(X):
-                    is_pillar_location = False
-                    if LAYOUT_MODE == "aligned":
-                        if x % PX == 0 and y % PY == 0:
-                            is_pillar_location = True
-                    elif LAYOUT_MODE == "staggered":
-
-                        if z % 2 == 0:
-                            if x % PX == 0 and y % PY == 0:
-                                is_pillar_location = True
-
-                        else:  # z is odd
-                            if (x + PX // 2) % PX == 0 and (
-                                y + PY // 2
-                            ) % PY == 0:
-                                is_pillar_location = True
-                    else:
-                        raise ValueError(
-                            f"Invalid layout specified: {LAYOUT_MODE}"
-                        )
-
-                    if is_pillar_location:
-                        a = _idx(x, y, z)
-                        b = _idx(x, y, z + 1)
-                        int_links_z.append(
-                            IntLink(
-                                link_id=link_count,
-                                src_node=routers[a],
-                                dst_node=routers[b],
-                                src_outport="Up",
-                                dst_inport="Down",
-                                latency=vlink_latency,
-                                weight=WZN,
-                            )
-                        )
-                        link_count += 1
-                        int_links_z.append(
-                            IntLink(
-                                link_id=link_count,
-                                src_node=routers[b],
-                                dst_node=routers[a],
-                                src_outport="Down",
-                                dst_inport="Up",
-                                latency=vlink_latency,
-                                weight=WZP,
-                            )
-                        )
-                        link_count += 1
-
-        int_links.extend(int_links_z)
+        specs = _plan_links(
+            X,
+            Y,
+            Z,
+            PX,
+            PY,
+            LAYOUT_MODE,
+            ((WXP, WXN), (WYP, WYN), (WZP, WZN)),
+            link_latency,
+            vlink_latency,
+        )
+
+        int_links = [
+            IntLink(
+                link_id=i,
+                src_node=routers[src_id],
+                dst_node=routers[dst_id],
+                src_outport=src_port,
+                dst_inport=dst_port,
+                latency=lat,
+                weight=w,
+            )
+            for i, (src_id, dst_id, src_port, dst_port, lat, w) in enumerate(
+                specs, start=link_count
+            )
+        ]
         network.int_links = int_links
 
     def registerTopology(self, options):
@@ -1,10 +1,12 @@
 # Sparse-Vertical 3D (Pillar-based) topology with Torus links for Garnet 3.0
 
-from m5.params import *
-from m5.objects import *
+from itertools import count
+
+from m5.params import MemorySize
 
 from common import FileSystemConfig
 from topologies.BaseTopology import SimpleTopology
+from topologies._mesh_util import AXIS_PORTS, axis_pairs, build_ext_links
 
 
 class Sparse3D_Pillars_torus(SimpleTopology):
@@ -38,9 +40,8 @@ class Sparse3D_Pillars_torus(SimpleTopology):
                 PX % 2 == 0 and PY % 2 == 0
             ), "Staggered layout requires even spacing"
 
-        # ----- Helper Functions -----
-        def _idx(x, y, z):
-            return z * (X * Y) + y * X + x
+        # router id = z * XY + y * X + x
+        XY = X * Y
 
         # ----- Link Latencies -----
         link_latency = options.link_latency
@@ -54,144 +55,63 @@ class Sparse3D_Pillars_torus(SimpleTopology):
         ]
         network.routers = routers
 
-        link_count = 0
-
         # ----- External Links -----
-        ext_links = []
-        cntrls_per_router, remainder = divmod(len(nodes), num_routers)
-        network_nodes = nodes[: len(nodes) - remainder]
-        remainder_nodes = nodes[len(nodes) - remainder :]
-        for (i, n) in enumerate(network_nodes):
-            cntrl_level, router_id = divmod(i, num_routers)
-            assert cntrl_level < cntrls_per_router
-            ext_links.append(
-                ExtLink(
-                    link_id=link_count,
-                    ext_node=n,
-                    int_node=routers[router_id],
-                    latency=link_latency,
-                )
-            )
-            link_count += 1
-
-        for (i, node) in enumerate(remainder_nodes):
-            assert node.type == "DMA_Controller"
-            assert i < remainder
-            ext_links.append(
-                ExtLink(
-                    link_id=link_count,
-                    ext_node=node,
-                    int_node=routers[0],
-                    latency=link_latency,
-                )
-            )
-            link_count += 1
+        # uniform over the routers, the remainder (DMA) on router 0
+        ext_links, next_id = build_ext_links(
+            ExtLink, nodes, routers, num_routers, link_latency
+        )
         network.ext_links = ext_links
 
+        # unique link ids, handed out in creation order
+        lid = count(next_id)
+
         # ----- Internal Links -----
-        int_links = []
-
-        # East-West (+X / -X) links with wraparound
-        for z in range(Z):
-            for y in range(Y):
-                for x in range(X):
-                    a = _idx(x, y, z)
-                    b = _idx((x + 1) % X, y, z)
-                    int_links.append(
-                        IntLink(
-                            link_id=link_count,
-                            src_node=routers[a],
-                            dst_node=routers[b],
-                            src_outport="East",
-                            dst_inport="West",
-                            latency=link_latency,
-                            weight=WXP,
-                        )
-                    )
-                    link_count += 1
-                    int_links.append(
-                        IntLink(
-                            link_id=link_count,
-                            src_node=routers[b],
-                            dst_node=routers[a],
-                            src_outport="West",
-                            dst_inport="East",
-                            latency=link_latency,
-                            weight=WXN,
-                        )
-                    )
-                    link_count += 1
-
-        # North-South (+Y / -Y) links with wraparound
-        for z in range(Z):
-            for x in range(X):
-                for y in range(Y):
-                    a = _idx(x, y, z)
-                    b = _idx(x, (y + 1) % Y, z)
-                    int_links.append(
-                        IntLink(
-                            link_id=link_count,
-                            src_node=routers[a],
-                            dst_node=routers[b],
-                            src_outport="North",
-                            dst_inport="South",
-                            latency=link_latency,
-                            weight=WYP,
-                        )
-                    )
-                    link_count += 1
-                    int_links.append(
-                        IntLink(
-                            link_id=link_count,
-                            src_node=routers[b],
-                            dst_node=routers[a],
-                            src_outport="South",
-                            dst_inport="North",
-                            latency=link_latency,
-                            weight=WYN,
-                        )
-                    )
-                    link_count += 1
+        # Every edge (a, b) becomes a -> b (fwd_out / fwd_in, w_ab) then
+        # b -> a (fwd_in / fwd_out, w_ba); one comprehension per axis.
+        def bidir_links(pairs, ports, lat, w_ab, w_ba):
+            fwd_out, fwd_in = ports
+            return [
+                IntLink(
+                    link_id=next(lid),
+                    src_node=routers[src],
+                    dst_node=routers[dst],
+                    src_outport=out_port,
+                    dst_inport=in_port,
+                    latency=lat,
+                    weight=w,
+                )
+                for a, b in pairs
+                for src, dst, out_port, in_port, w in (
+                    (a, b, fwd_out, fwd_in, w_ab),
+                    (b, a, fwd_in, fwd_out, w_ba),
+                )
+            ]
+
+        EW, NS, UD = AXIS_PORTS
+
+        # East-West (+X / -X) and North-South (+Y / -Y) links with
+        # wraparound
+        int_links = bidir_links(
+            axis_pairs(X, Y, Z, 0, True), EW, link_latency, WXP, WXN
+        )
+        int_links += bidir_links(
+            axis_pairs(X, Y, Z, 1, True), NS, link_latency, WYP, WYN
+        )
 
         # Z-links (Up/Down) only on pillars, with wraparound; single link with adjusted latency
-        for y in range(Y):
-            for x in range(X):
-                is_pillar_location = False
-                if LAYOUT_MODE == "aligned":
-                    if x % PX == 0 and y % PY == 0:
-                        is_pillar_location = True
-                elif LAYOUT_MODE == "staggered":
-                    if x % PX == 0 and y % PY == 0:
-                        is_pillar_location = True
-
-                if is_pillar_location:
-                    for z in range(Z):
-                        a = _idx(x, y, z)
-                        b = _idx(x, y, (z + 1) % Z)
-                        int_links.append(
-                            IntLink(
-                                link_id=link_count,
-                                src_node=routers[a],
-                                dst_node=routers[b],
-                                src_outport="Up",
-                                dst_inport="Down",
-                                latency=vlink_latency,
-                                weight=WZP,
-                            )
-                        )
-                        link_count += 1
-                        int_links.append(
-                            IntLink(
-                                link_id=link_count,
-                                src_node=routers[b],
-                                dst_node=routers[a],
-                                src_outport="Down",
-                                dst_inport="Up",
-                                latency=vlink_latency,
-                                weight=WZN,
-                            )
-                        )
-                        link_count += 1
+        # The pillar columns are fixed by PX/PY (both layouts use the aligned
+        # grid here), so walk them directly instead of testing every (x, y).
+        if LAYOUT_MODE not in ("aligned", "staggered"):
+            raise ValueError(f"Invalid layout specified: {LAYOUT_MODE}")
+        pillar_xs = [x for x in range(X) if x % PX == 0]
+        pillar_ys = [y for y in range(Y) if y % PY == 0]
+        z_pairs = [
+            (z * XY + y * X + x, (z + 1) % Z * XY + y * X + x)
+            for y in pillar_ys
+            for x in pillar_xs
+            for z in range(Z)
+        ]
+        int_links += bidir_links(z_pairs, UD, vlink_latency, WZP, WZN)
 
         network.int_links = int_links
 
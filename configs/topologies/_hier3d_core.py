@@ -0,0 +1,80 @@
+# configs/topologies/_hier3d_core.py
+#
+# Index math and link-spec generation shared by Hier3D_Chiplet and
+# Hier3D_ClusterHub. Only plain ints/lists/tuples live here; turning the
+# specs into ExtLink / IntLink SimObjects stays in the topologies.
+#
+# A link spec is (src_id, dst_id, src_port, dst_port, latency, weight).
+
+# (a->b outport, a->b inport, b->a outport, b->a inport) of the mesh axes
+EW_PORTS = ("East", "West", "West", "East")
+NS_PORTS = ("North", "South", "South", "North")
+UD_PORTS = ("Up", "Down", "Down", "Up")
+
+
+def id_grid(X, Y, Z, base=0):
+    """grid[z][y][x] -> base + z*X*Y + y*X + x"""
+    return [
+        [[base + (z * Y + y) * X + x for x in range(X)] for y in range(Y)]
+        for z in range(Z)
+    ]
+
+
+def ext_router_ids(num_nodes, num_routers):
+    """Router id of every controller: controllers are spread uniformly over
+    the routers, the remainder (DMA) goes to router 0."""
+    boundary = num_nodes - num_nodes % num_routers
+    return [i % num_routers if i < boundary else 0 for i in range(num_nodes)]
+
+
+def stencil_pairs(grid):
+    """(x_pairs, y_pairs, z_pairs): every id in grid[z][y][x] paired with
+    its +1 neighbour along each axis."""
+    x_pairs = [
+        pair for layer in grid for row in layer for pair in zip(row, row[1:])
+    ]
+    y_pairs = [
+        pair
+        for layer in grid
+        for lo, hi in zip(layer, layer[1:])
+        for pair in zip(lo, hi)
+    ]
+    z_pairs = [
+        pair
+        for lo, hi in zip(grid, grid[1:])
+        for lo_row, hi_row in zip(lo, hi)
+        for pair in zip(lo_row, hi_row)
+    ]
+    return x_pairs, y_pairs, z_pairs
+
+
+def chiplet_pairs(grid, CHIP_X, CHIP_Y, CHIP_Z):
+    """(a, b, axis) for every id in grid[z][y][x] and its +1 neighbour
+    along axis 0/1/2 (x/y/z), but only neighbours inside the same
+    CHIP_X x CHIP_Y x CHIP_Z chiplet. Pairs come router by router, +x then
+    +y then +z. The grid dims must be multiples of the chiplet dims, so
+    n -> n + 1 stays inside iff (n + 1) % CHIP_n."""
+    Z, Y, X = len(grid), len(grid[0]), len(grid[0][0])
+    pairs = []
+    for z in range(Z):
+        for y in range(Y):
+            for x in range(X):
+                a = grid[z][y][x]
+                if (x + 1) % CHIP_X:
+                    pairs.append((a, grid[z][y][x + 1], 0))
+                if (y + 1) % CHIP_Y:
+                    pairs.append((a, grid[z][y + 1][x], 1))
+                if (z + 1) % CHIP_Z:
+                    pairs.append((a, grid[z + 1][y][x], 2))
+    return pairs
+
+
+def add_bidi(specs, pairs, ports, latency, weight):
+    """Append the a -> b and b -> a spec of every (a, b) in pairs.
+
+    ports is (a->b outport, a->b inport, b->a outport, b->a inport).
+    """
+    fwd_out, fwd_in, rev_out, rev_in = ports
+    for a, b in pairs:
+        specs.append((a, b, fwd_out, fwd_in, latency, weight))
+        specs.append((b, a, rev_out, rev_in, latency, weight))
@@ -0,0 +1,115 @@
+# configs/topologies/_mesh_util.py
+#
+# Per-axis edge enumeration and ExtLink / IntLink emission shared by the
+# regular 3D mesh / torus topologies (Mesh3D_XYZ, Torus3D and the
+# Sparse3D pillar variants). Routers are numbered
+# z*X*Y + y*X + x, so the +X / +Y / +Z neighbour is at stride 1 / X / X*Y.
+
+from itertools import count
+from typing import NamedTuple
+
+
+class LinkSpec(NamedTuple):
+    """One directed IntLink, kept as plain data until the topology turns
+    it into a SimObject."""
+
+    src: int
+    dst: int
+    src_outport: str
+    dst_inport: str
+    latency: int
+    weight: int
+
+
+# (+axis outport, +axis inport) of the X / Y / Z axes; the reverse link
+# swaps the two
+AXIS_PORTS = (("East", "West"), ("North", "South"), ("Up", "Down"))
+
+
+def axis_pairs(X, Y, Z, axis, wrap=False):
+    """(a, b) router ids of every +axis edge (axis 0/1/2 = X/Y/Z), as a
+    tuple.
+
+    With wrap the last router of each line is also joined to the first.
+    The two other axes are walked outer-to-inner by decreasing stride.
+    """
+    dims = (X, Y, Z)
+    strides = (1, X, X * Y)
+    n, stride = dims[axis], strides[axis]
+    outer, inner = [d for d in (2, 1, 0) if d != axis]
+    so, si = strides[outer], strides[inner]
+
+    # each line along the axis is a range of ids; zipping it with itself
+    # shifted by one gives the edges without per-id arithmetic
+    pairs = []
+    for o in range(dims[outer]):
+        for i in range(dims[inner]):
+            base = o * so + i * si
+            line = range(base, base + n * stride, stride)
+            pairs += zip(line, line[1:])
+            if wrap:
+                pairs.append((line[-1], line[0]))
+    return tuple(pairs)
+
+
+def emit_axis(
+    routers,
+    X,
+    Y,
+    Z,
+    axis,
+    *,
+    wrap,
+    latency,
+    weight,
+    fwd_port,
+    rev_port,
+    link_id_start,
+    IntLink
+):
+    """Build both directions of every +axis edge.
+
+    a -> b uses fwd_port / rev_port, b -> a uses rev_port / fwd_port.
+    Returns (links, next_id).
+    """
+    lid = count(link_id_start)
+    links = [
+        IntLink(
+            link_id=next(lid),
+            src_node=routers[src],
+            dst_node=routers[dst],
+            src_outport=out_port,
+            dst_inport=in_port,
+            latency=latency,
+            weight=weight,
+        )
+        for a, b in axis_pairs(X, Y, Z, axis, wrap)
+        for src, dst, out_port, in_port in (
+            (a, b, fwd_port, rev_port),
+            (b, a, rev_port, fwd_port),
+        )
+    ]
+    return links, next(lid)
+
+
+def build_ext_links(
+    ExtLink, nodes, routers, num_routers, link_latency, start_id=0
+):
+    """One ExtLink per controller, with ids start_id, start_id + 1, ...
+
+    Controllers go round-robin over the first num_routers routers; the
+    len(nodes) % num_routers leftover ones must be DMA and go to router 0.
+    Returns (ext_links, next_id).
+    """
+    cutoff = len(nodes) - len(nodes) % num_routers
+    assert all(n.type == "DMA_Controller" for n in nodes[cutoff:])
+    ext_links = [
+        ExtLink(
+            link_id=start_id + i,
+            ext_node=n,
+            int_node=routers[i % num_routers if i < cutoff else 0],
+            latency=link_latency,
+        )
+        for i, n in enumerate(nodes)
+    ]
+    return ext_links, start_id + len(nodes)
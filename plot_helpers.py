@@ -0,0 +1,216 @@
+"""
+Helpers shared by the result-plotting scripts (test.py, topo_plot.py,
+zlink_plot.py): typed CSV loading, column cleaning and the
+per-(Traffic, Topology) summary, output file names, log-axis floors and the
+matplotlib line plots.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def import_plotting(show=False):
+    """Import and return (matplotlib.pyplot, seaborn), with the Agg backend
+    unless show. The scripts call this once there is data to plot: the two
+    imports take most of their startup time and are not needed to fail on
+    an empty CSV."""
+    import matplotlib
+
+    # batch runs only write files, so skip the interactive (GUI) backend
+    if not show:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    return plt, sns
+
+
+# Column types of the sweep CSV, so read_csv can skip type inference
+CSV_DTYPES = {
+    "Topology": str,
+    "Traffic": str,
+    "InjectionRate": "float64",
+    "Throughput": "float64",
+    "PacketsInjected": "float64",
+    "PacketsReceived": "float64",
+    "AvgTotalLatency": "float64",
+    "AvgHops": "float64",
+}
+
+
+def load_csv(csv_path: str, columns=None) -> pd.DataFrame:
+    """Read csv_path with the CSV_DTYPES column types. With columns, only
+    those columns are read (header names are compared stripped)."""
+    usecols = None
+    if columns:
+
+        def usecols(c):
+            return c.strip() in columns
+
+    try:
+        return pd.read_csv(
+            csv_path, usecols=usecols, dtype=CSV_DTYPES, engine="c"
+        )
+    except ValueError:
+        # malformed numbers: read untyped and let to_numeric() coerce them
+        return pd.read_csv(csv_path, usecols=usecols)
+
+
+def ensure_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Strip header names, map the old column aliases and check that every
+    sweep column is there (an older CSV without Topology gets Mesh_XY)."""
+    df.columns = df.columns.str.strip()
+
+    # Backward-compat column aliases
+    rename_map = {}
+    if "SentPackets" in df.columns and "PacketsInjected" not in df.columns:
+        rename_map["SentPackets"] = "PacketsInjected"
+    if "ReceivedPackets" in df.columns and "PacketsReceived" not in df.columns:
+        rename_map["ReceivedPackets"] = "PacketsReceived"
+    if (
+        "AvgPacketLatency" in df.columns
+        and "AvgTotalLatency" not in df.columns
+    ):
+        rename_map["AvgPacketLatency"] = "AvgTotalLatency"
+
+    if rename_map:
+        df = df.rename(columns=rename_map)
+
+    if "Topology" not in df.columns:
+        # If older CSVs didn't include topology, assume Mesh_XY to keep plotting usable
+        df["Topology"] = "Mesh_XY"
+
+    required = [
+        "Topology",
+        "Traffic",
+        "InjectionRate",
+        "Throughput",
+        "PacketsInjected",
+        "PacketsReceived",
+        "AvgTotalLatency",
+        "AvgHops",
+    ]
+    missing = [c for c in required if c not in df.columns]
+    if missing:
+        raise ValueError(
+            f"CSV missing columns: {missing}\nFound: {list(df.columns)}"
+        )
+
+    return df
+
+
+def to_numeric(df: pd.DataFrame) -> pd.DataFrame:
+    """Coerce the metric columns to numbers and drop rows that cannot be
+    plotted."""
+    cols = [
+        "InjectionRate",
+        "Throughput",
+        "PacketsInjected",
+        "PacketsReceived",
+        "AvgTotalLatency",
+        "AvgHops",
+    ]
+    # columns read_csv already typed (CSV_DTYPES) need no coercion
+    cols = [c for c in cols if not pd.api.types.is_numeric_dtype(df[c])]
+    if cols:
+        df[cols] = df[cols].apply(pd.to_numeric, errors="coerce")
+
+    df = df.dropna(subset=["InjectionRate", "Throughput", "AvgTotalLatency"])
+    return df
+
+
+def summarize(df: pd.DataFrame, knee_factor: float) -> pd.DataFrame:
+    """Per (Traffic, Topology) metrics; df must be sorted by Traffic,
+    Topology, InjectionRate with a unique index, as main() leaves it."""
+    keys = ["Traffic", "Topology"]
+    grp = df.groupby(keys, sort=True, observed=True)
+
+    # Peak throughput (first maximum of each group)
+    peak = df.loc[grp["Throughput"].idxmax()].set_index(keys)
+
+    # Low-load latency at min inj: the first row of each sorted group
+    low = df.drop_duplicates(keys).set_index(keys)
+
+    # Knee: lowest inj whose latency reaches knee_factor * low-load latency
+    thresh = grp["AvgTotalLatency"].transform("first") * knee_factor
+    knee = (
+        df[df["AvgTotalLatency"] >= thresh]
+        .groupby(keys, observed=True)["InjectionRate"]
+        .min()
+    )
+
+    summary = pd.DataFrame(
+        {
+            "PeakThroughput": peak["Throughput"],
+            "InjectionAtPeakTP": peak["InjectionRate"],
+            "LowLoadInjection": low["InjectionRate"].astype(float),
+            "LowLoadLatency": low["AvgTotalLatency"].astype(float),
+            "KneeFactor": knee_factor,
+            # groups without a knee are missing here and align to NaN
+            "KneeInjectionRate": knee.astype(float),
+        }
+    )
+    return summary.reset_index().sort_values(keys)
+
+
+# Characters safe_name() replaces with "_" in output file names
+_SAFE_NAME_TABLE = str.maketrans({" ": "_", "/": "_"})
+
+
+def safe_name(s) -> str:
+    """s as a file-name fragment: spaces and slashes become underscores."""
+    return str(s).translate(_SAFE_NAME_TABLE)
+
+
+def log_ymin(values: pd.Series, floor: float) -> float:
+    """Lower y-limit for a log axis: the smallest positive value, but at
+    least floor (and floor itself when there is none)."""
+    arr = values.to_numpy()
+    arr = arr[arr > 0]
+    return max(floor, float(arr.min())) if arr.size else floor
+
+
+# Marker per line, in the order seaborn's style= mapping uses them
+LINE_MARKERS = ["o", "X", "s", "P", "D", "^", "v", "p"]
+
+# Columns split_arrays() keeps for the line plots
+LINE_COLUMNS = ("InjectionRate", "Throughput", "AvgTotalLatency")
+
+
+def split_arrays(df, by):
+    """[(name, {column: ndarray})] per by-group of df, for the plotted
+    columns only, so the line plots index plain float arrays instead of
+    going through pandas for every figure."""
+    return [
+        (name, {c: g[c].to_numpy(dtype=float) for c in LINE_COLUMNS})
+        for name, g in df.groupby(by, observed=True)
+    ]
+
+
+def plot_lines_by(groups, x, y, ax=None, colors=None, marker=None, **line_kws):
+    """One matplotlib line per (name, data) in groups on ax (default: the
+    current axes); data is split_arrays() output or any frame with x / y
+    columns. Repeated x values are averaged, as
+    sns.lineplot's default estimator does, but without its bootstrapped
+    confidence band.
+
+    colors maps a name to its colour (default: the axes' colour cycle);
+    marker is used for every line (default: one per line from LINE_MARKERS).
+    Other keyword arguments go to every ax.plot call.
+    """
+    if ax is None:
+        # imported on use, so the CSV helpers load without matplotlib
+        import matplotlib.pyplot as plt
+
+        ax = plt.gca()
+    for i, (name, g) in enumerate(groups):
+        xs, inv = np.unique(g[x], return_inverse=True)
+        ys = np.bincount(inv, weights=g[y]) / np.bincount(inv)
+        ax.plot(
+            xs,
+            ys,
+            marker=marker or LINE_MARKERS[i % len(LINE_MARKERS)],
+            color=colors[name] if colors else None,
+            label=name,
+            **line_kws,
+        )
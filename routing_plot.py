@@ -86,16 +86,27 @@ def main():
     def safe_name(s: str) -> str:
         return str(s).replace(" ", "_").replace("/", "_")
 
+    # Split the frame once per (topology, traffic) scenario, and each
+    # scenario once per routing algorithm (sorted by injection rate), so
+    # the plot loops below only do dict lookups instead of boolean masks.
+    scenarios = {
+        key: (
+            subset,
+            [
+                (routing_algo, g.sort_values("InjectionRate"))
+                for routing_algo, g in subset.groupby("Routing")
+            ],
+        )
+        for key, subset in df.groupby(["Topology", "Traffic"], sort=False)
+    }
+
     for metric_key, y_label in METRICS_TO_PLOT.items():
         for topo in topologies:
             for traffic in traffics:
-                # Filter data for the current scenario
-                subset = df[
-                    (df["Topology"] == topo) & (df["Traffic"] == traffic)
-                ]
-
-                if subset.empty:
+                # Look up the data for the current scenario
+                if (topo, traffic) not in scenarios:
                     continue
+                subset, runs = scenarios[(topo, traffic)]
 
                 print(
                     f"Plotting [{metric_key}] for Topology='{topo}', Traffic='{traffic}'..."
@@ -105,10 +116,7 @@ def main():
                 fig, ax = plt.subplots(figsize=(12, 8))
 
                 # Plot a line for each routing algorithm
-                for routing_algo in sorted(subset["Routing"].unique()):
-                    routing_data = subset[
-                        subset["Routing"] == routing_algo
-                    ].sort_values("InjectionRate")
+                for routing_algo, routing_data in runs:
                     style = ROUTING_STYLES.get(routing_algo, {})
                     ax.plot(
                         routing_data["InjectionRate"],
@@ -149,14 +157,12 @@ def main():
                 plt.close(fig)
 
                 # Log-scale Y variant
-                yvals = subset[metric_key].replace(0, np.nan)
+                yvals = subset[metric_key].to_numpy()
+                yvals = yvals[yvals > 0]
                 if np.isfinite(yvals).any():
-                    ymin = float(np.nanmin(yvals))
+                    ymin = float(yvals.min())
                     fig, ax = plt.subplots(figsize=(12, 8))
-                    for routing_algo in sorted(subset["Routing"].unique()):
-                        routing_data = subset[
-                            subset["Routing"] == routing_algo
-                        ].sort_values("InjectionRate")
+                    for routing_algo, routing_data in runs:
                         style = ROUTING_STYLES.get(routing_algo, {})
                         ax.plot(
                             routing_data["InjectionRate"],
@@ -188,10 +194,7 @@ def main():
                     subset.columns
                 ):
                     fig, ax = plt.subplots(figsize=(12, 8))
-                    for routing_algo in sorted(subset["Routing"].unique()):
-                        routing_data = subset[
-                            subset["Routing"] == routing_algo
-                        ].sort_values("InjectionRate")
+                    for routing_algo, routing_data in runs:
                         style = ROUTING_STYLES.get(routing_algo, {})
                         ax.plot(
                             routing_data["Throughput"],
@@ -3,7 +3,7 @@
 Built-in-config plotting for gem5 Garnet topology comparison.
 Input CSV must have (header row): Topology,Traffic,InjectionRate,Throughput,PacketsInjected,PacketsReceived,AvgTotalLatency,AvgHops
 
-Outputs go to OUTDIR:
+Outputs go to OUTDIR (figures as .png, see FIG_FORMAT):
 - throughput_vs_injection_<TRAFFIC>.png
 - latency_vs_injection_<TRAFFIC>.png
 - latency_vs_throughput_<TRAFFIC>.png
@@ -19,16 +19,29 @@ import os
 import sys
 import math
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+from plot_helpers import (
+    ensure_columns,
+    import_plotting,
+    load_csv,
+    log_ymin,
+    plot_lines_by,
+    safe_name,
+    split_arrays,
+    summarize,
+    to_numeric,
+)
 
 # ============================== CONFIG ======================================
 CSV_FILE = "./lab4/sec2/results.csv"
 OUTDIR = "./lab4/sec2/plots"
 DPI = 300
 
+# Figure file format: "png", or e.g. "pdf" / "svg" for vector output that
+# skips the raster (PNG) encode
+FIG_FORMAT = "png"
+
 # Knee = first InjectionRate where latency >= KNEE_FACTOR * low-load latency
 KNEE_FACTOR = 2.0
 
@@ -41,60 +54,9 @@ SHOW = False
 
 # ============================================================================
 
-def ensure_columns(df: pd.DataFrame) -> pd.DataFrame:
-    df.columns = [c.strip() for c in df.columns]
-    
-    # Backward-compat column aliases
-    rename_map = {}
-    if "SentPackets" in df.columns and "PacketsInjected" not in df.columns:
-        rename_map["SentPackets"] = "PacketsInjected"
-    if "ReceivedPackets" in df.columns and "PacketsReceived" not in df.columns:
-        rename_map["ReceivedPackets"] = "PacketsReceived"
-    if (
-        "AvgPacketLatency" in df.columns
-        and "AvgTotalLatency" not in df.columns
-    ):
-        rename_map["AvgPacketLatency"] = "AvgTotalLatency"
-    
-    if rename_map:
-        df = df.rename(columns=rename_map)
-    
-    if "Topology" not in df.columns:
-        # If older CSVs didn't include topology, assume Mesh_XY to keep plotting usable
-        df["Topology"] = "Mesh_XY"
-    
-    required = [
-        "Topology",
-        "Traffic",
-        "InjectionRate",
-        "Throughput",
-        "PacketsInjected",
-        "PacketsReceived",
-        "AvgTotalLatency",
-        "AvgHops",
-    ]
-    missing = [c for c in required if c not in df.columns]
-    if missing:
-        raise ValueError(
-            f"CSV missing columns: {missing}\nFound: {list(df.columns)}"
-        )
-    
-    return df
-
-
-def to_numeric(df: pd.DataFrame) -> pd.DataFrame:
-    for col in [
-        "InjectionRate",
-        "Throughput",
-        "PacketsInjected",
-        "PacketsReceived",
-        "AvgTotalLatency",
-        "AvgHops",
-    ]:
-        df[col] = pd.to_numeric(df[col], errors="coerce")
-    
-    df = df.dropna(subset=["InjectionRate", "Throughput", "AvgTotalLatency"])
-    return df
+# matplotlib.pyplot / seaborn, set from import_plotting() once there is data
+plt = None
+sns = None
 
 
 def maybe_filter(df: pd.DataFrame) -> pd.DataFrame:
@@ -107,68 +69,32 @@ def maybe_filter(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def safe_name(s: str) -> str:
-    return str(s).replace(" ", "_").replace("/", "_")
-
-
-def summarize(df: pd.DataFrame, knee_factor: float) -> pd.DataFrame:
-    rows = []
-    for (traffic, topo), g in df.groupby(["Traffic", "Topology"], sort=True):
-        g = g.sort_values("InjectionRate")
-        
-        # Peak throughput
-        idx_peak = g["Throughput"].idxmax()
-        peak_tp = g.loc[idx_peak, "Throughput"]
-        inj_at_peak = g.loc[idx_peak, "InjectionRate"]
-        
-        # Low-load latency at min inj
-        min_inj = g["InjectionRate"].min()
-        low_latency = g.loc[g["InjectionRate"].idxmin(), "AvgTotalLatency"]
-        
-        # Knee
-        knee_thresh = low_latency * knee_factor
-        knee_rows = g[g["AvgTotalLatency"] >= knee_thresh]
-        knee_inj = (
-            knee_rows["InjectionRate"].min()
-            if not knee_rows.empty
-            else np.nan
-        )
-        
-        rows.append(
-            {
-                "Traffic": traffic,
-                "Topology": topo,
-                "PeakThroughput": peak_tp,
-                "InjectionAtPeakTP": inj_at_peak,
-                "LowLoadInjection": float(min_inj),
-                "LowLoadLatency": float(low_latency),
-                "KneeFactor": knee_factor,
-                "KneeInjectionRate": (
-                    float(knee_inj) if not pd.isna(knee_inj) else np.nan
-                ),
-            }
-        )
-    
-    return pd.DataFrame(rows).sort_values(["Traffic", "Topology"])
+# Figures of the fixed-size line plots, reused (cleared) for every PNG of
+# that size instead of being closed and re-created each time
+_FIGURES = {}
+
+
+def reuse_figure(figsize):
+    """Make a cleared figure of the given size current and return it."""
+    fig = _FIGURES.get(figsize)
+    if fig is None or not plt.fignum_exists(fig.number):
+        fig = _FIGURES[figsize] = plt.figure(figsize=figsize)
+    else:
+        fig.clf()
+        plt.figure(fig.number)
+    return fig
 
 
 # NEW FUNCTION: Injection Rate vs Throughput (by Topology)
-def plot_inj_rate_vs_throughput_by_topology(df, topology, outdir, dpi):
+def plot_inj_rate_vs_throughput_by_topology(groups, topology, outdir, dpi):
     """
     Plot Injection Rate vs Throughput for a specific topology.
-    Different traffic patterns (flow patterns) are shown in the same plot.
+    Different traffic patterns (flow patterns) are shown in the same plot;
+    groups is the topology's data split per traffic pattern.
     """
-    plt.figure(figsize=(8, 6))
+    reuse_figure((8, 6))
     
-    sns.lineplot(
-        data=df,
-        x="InjectionRate",
-        y="Throughput",
-        hue="Traffic",
-        style="Traffic",
-        markers=True,
-        dashes=False,
-    )
+    plot_lines_by(groups, "InjectionRate", "Throughput")
     
     plt.title(
         f"Injection Rate vs Throughput — {topology}",
@@ -181,32 +107,24 @@ def plot_inj_rate_vs_throughput_by_topology(df, topology, outdir, dpi):
     plt.legend(title="Traffic Pattern")
     
     fn = os.path.join(
-        outdir, f"inj_rate_vs_throughput_{safe_name(topology)}.png"
+        outdir, f"inj_rate_vs_throughput_{safe_name(topology)}.{FIG_FORMAT}"
     )
     plt.savefig(fn, dpi=dpi, bbox_inches="tight")
     if SHOW:
         plt.show()
-    plt.close()
     return fn
 
 
 # NEW FUNCTION: Throughput vs Latency (by Topology)
-def plot_throughput_vs_latency_by_topology(df, topology, outdir, dpi):
+def plot_throughput_vs_latency_by_topology(groups, topology, outdir, dpi):
     """
     Plot Throughput vs Latency for a specific topology.
-    Different traffic patterns (flow patterns) are shown in the same plot.
+    Different traffic patterns (flow patterns) are shown in the same plot;
+    groups is the topology's data split per traffic pattern.
     """
-    plt.figure(figsize=(8, 6))
+    reuse_figure((8, 6))
     
-    sns.lineplot(
-        data=df,
-        x="Throughput",
-        y="AvgTotalLatency",
-        hue="Traffic",
-        style="Traffic",
-        markers=True,
-        dashes=False,
-    )
+    plot_lines_by(groups, "Throughput", "AvgTotalLatency")
     
     plt.title(
         f"Throughput vs Latency — {topology}",
@@ -220,27 +138,28 @@ def plot_throughput_vs_latency_by_topology(df, topology, outdir, dpi):
     plt.legend(title="Traffic Pattern")
     
     fn = os.path.join(
-        outdir, f"throughput_vs_latency_{safe_name(topology)}.png"
+        outdir, f"throughput_vs_latency_{safe_name(topology)}.{FIG_FORMAT}"
     )
     plt.savefig(fn, dpi=dpi, bbox_inches="tight")
     if SHOW:
         plt.show()
-    plt.close()
     return fn
 
 
+def plot_by_topology(df, topology, outdir, dpi):
+    """Both per-topology figures, from a single split of df per traffic
+    pattern. Returns the two file names."""
+    groups = split_arrays(df, "Traffic")
+    return [
+        plot_inj_rate_vs_throughput_by_topology(groups, topology, outdir, dpi),
+        plot_throughput_vs_latency_by_topology(groups, topology, outdir, dpi),
+    ]
+
+
 # EXISTING FUNCTIONS (keeping all the original functionality)
-def plot_throughput_vs_injection(df, traffic, outdir, dpi):
-    plt.figure(figsize=(12, 7))
-    sns.lineplot(
-        data=df,
-        x="InjectionRate",
-        y="Throughput",
-        hue="Topology",
-        style="Topology",
-        markers=True,
-        dashes=False,
-    )
+def plot_throughput_vs_injection(groups, traffic, outdir, dpi):
+    reuse_figure((12, 7))
+    plot_lines_by(groups, "InjectionRate", "Throughput")
     plt.title(
         f"Throughput vs Injection Rate — {traffic}",
         fontsize=16,
@@ -252,26 +171,17 @@ def plot_throughput_vs_injection(df, traffic, outdir, dpi):
     plt.legend(title="Topology")
     
     fn = os.path.join(
-        outdir, f"throughput_vs_injection_{safe_name(traffic)}.png"
+        outdir, f"throughput_vs_injection_{safe_name(traffic)}.{FIG_FORMAT}"
     )
     plt.savefig(fn, dpi=dpi, bbox_inches="tight")
     if SHOW:
         plt.show()
-    plt.close()
     return fn
 
 
-def plot_latency_vs_injection(df, traffic, outdir, dpi):
-    plt.figure(figsize=(12, 7))
-    sns.lineplot(
-        data=df,
-        x="InjectionRate",
-        y="AvgTotalLatency",
-        hue="Topology",
-        style="Topology",
-        markers=True,
-        dashes=False,
-    )
+def plot_latency_vs_injection(groups, traffic, outdir, dpi, knee_map):
+    reuse_figure((12, 7))
+    plot_lines_by(groups, "InjectionRate", "AvgTotalLatency")
     plt.title(
         f"Latency vs Injection Rate — {traffic}",
         fontsize=16,
@@ -283,53 +193,41 @@ def plot_latency_vs_injection(df, traffic, outdir, dpi):
     plt.grid(True, linestyle="--", alpha=0.4)
     plt.legend(title="Topology")
     
-    # Annotate knee (first inj where latency >= 2x low-load)
-    try:
-        for topo, g in df.groupby("Topology"):
-            g = g.sort_values("InjectionRate")
-            low = g.loc[g["InjectionRate"].idxmin(), "AvgTotalLatency"]
-            thresh = low * KNEE_FACTOR
-            knees = g[g["AvgTotalLatency"] >= thresh]
-            if not knees.empty:
-                knee_inj = float(knees["InjectionRate"].min())
-                plt.axvline(
-                    knee_inj,
-                    color="black",
-                    linestyle="--",
-                    alpha=0.3,
-                )
-                plt.text(
-                    knee_inj,
-                    plt.gca().get_ylim()[1] * 0.85,
-                    f"knee {topo}\n@ {knee_inj:.3f}",
-                    rotation=90,
-                    va="top",
-                    ha="right",
-                    fontsize=8,
-                    alpha=0.7,
-                )
-    except Exception as e:
-        warnings.warn(f"Knee annotation skipped: {e}")
+    # Annotate knee (first inj where latency >= 2x low-load), as already
+    # found by summarize()
+    for topo, _ in groups:
+        knee_inj = knee_map.get((traffic, topo), math.nan)
+        if math.isnan(knee_inj):
+            continue
+        plt.axvline(
+            knee_inj,
+            color="black",
+            linestyle="--",
+            alpha=0.3,
+        )
+        plt.text(
+            knee_inj,
+            plt.gca().get_ylim()[1] * 0.85,
+            f"knee {topo}\n@ {knee_inj:.3f}",
+            rotation=90,
+            va="top",
+            ha="right",
+            fontsize=8,
+            alpha=0.7,
+        )
     
-    fn = os.path.join(outdir, f"latency_vs_injection_{safe_name(traffic)}.png")
+    fn = os.path.join(
+        outdir, f"latency_vs_injection_{safe_name(traffic)}.{FIG_FORMAT}"
+    )
     plt.savefig(fn, dpi=dpi, bbox_inches="tight")
     if SHOW:
         plt.show()
-    plt.close()
     return fn
 
 
-def plot_latency_vs_throughput(df, traffic, outdir, dpi):
-    plt.figure(figsize=(12, 7))
-    sns.lineplot(
-        data=df,
-        x="Throughput",
-        y="AvgTotalLatency",
-        hue="Topology",
-        style="Topology",
-        markers=True,
-        dashes=False,
-    )
+def plot_latency_vs_throughput(groups, traffic, outdir, dpi):
+    reuse_figure((12, 7))
+    plot_lines_by(groups, "Throughput", "AvgTotalLatency")
     plt.title(
         f"Latency vs Throughput — {traffic}",
         fontsize=16,
@@ -342,26 +240,17 @@ def plot_latency_vs_throughput(df, traffic, outdir, dpi):
     plt.legend(title="Topology")
     
     fn = os.path.join(
-        outdir, f"latency_vs_throughput_{safe_name(traffic)}.png"
+        outdir, f"latency_vs_throughput_{safe_name(traffic)}.{FIG_FORMAT}"
     )
     plt.savefig(fn, dpi=dpi, bbox_inches="tight")
     if SHOW:
         plt.show()
-    plt.close()
     return fn
 
 
-def plot_throughput_vs_injection_logy(df, traffic, outdir, dpi):
-    plt.figure(figsize=(12, 7))
-    sns.lineplot(
-        data=df,
-        x="InjectionRate",
-        y="Throughput",
-        hue="Topology",
-        style="Topology",
-        markers=True,
-        dashes=False,
-    )
+def plot_throughput_vs_injection_logy(groups, traffic, outdir, dpi, ymin):
+    reuse_figure((12, 7))
+    plot_lines_by(groups, "InjectionRate", "Throughput")
     plt.title(
         f"Throughput vs Injection Rate (log-y) — {traffic}",
         fontsize=16,
@@ -369,33 +258,24 @@ def plot_throughput_vs_injection_logy(df, traffic, outdir, dpi):
     )
     plt.xlabel("Injection Rate (pkts/node/cycle)")
     plt.ylabel("Throughput (accepted pkts/node/cycle)")
-    ymin = max(1e-6, float(np.nanmin(df["Throughput"].replace(0, np.nan))))
     plt.yscale("log")
     plt.ylim(bottom=ymin)
     plt.grid(True, which="both", linestyle="--", alpha=0.4)
     plt.legend(title="Topology")
     
     fn = os.path.join(
-        outdir, f"throughput_vs_injection_{safe_name(traffic)}_logy.png"
+        outdir,
+        f"throughput_vs_injection_{safe_name(traffic)}_logy.{FIG_FORMAT}",
     )
     plt.savefig(fn, dpi=dpi, bbox_inches="tight")
     if SHOW:
         plt.show()
-    plt.close()
     return fn
 
 
-def plot_latency_vs_injection_logy(df, traffic, outdir, dpi):
-    plt.figure(figsize=(12, 7))
-    sns.lineplot(
-        data=df,
-        x="InjectionRate",
-        y="AvgTotalLatency",
-        hue="Topology",
-        style="Topology",
-        markers=True,
-        dashes=False,
-    )
+def plot_latency_vs_injection_logy(groups, traffic, outdir, dpi, ymin):
+    reuse_figure((12, 7))
+    plot_lines_by(groups, "InjectionRate", "AvgTotalLatency")
     plt.title(
         f"Latency vs Injection Rate (log-y) — {traffic}",
         fontsize=16,
@@ -403,35 +283,23 @@ def plot_latency_vs_injection_logy(df, traffic, outdir, dpi):
     )
     plt.xlabel("Injection Rate (pkts/node/cycle)")
     plt.ylabel("Average Packet Latency (cycles)")
-    ymin = max(
-        1e-3, float(np.nanmin(df["AvgTotalLatency"].replace(0, np.nan)))
-    )
     plt.yscale("log")
     plt.ylim(bottom=ymin)
     plt.grid(True, which="both", linestyle="--", alpha=0.4)
     plt.legend(title="Topology")
     
     fn = os.path.join(
-        outdir, f"latency_vs_injection_{safe_name(traffic)}_logy.png"
+        outdir, f"latency_vs_injection_{safe_name(traffic)}_logy.{FIG_FORMAT}"
     )
     plt.savefig(fn, dpi=dpi, bbox_inches="tight")
     if SHOW:
         plt.show()
-    plt.close()
     return fn
 
 
-def plot_latency_vs_throughput_logy(df, traffic, outdir, dpi):
-    plt.figure(figsize=(12, 7))
-    sns.lineplot(
-        data=df,
-        x="Throughput",
-        y="AvgTotalLatency",
-        hue="Topology",
-        style="Topology",
-        markers=True,
-        dashes=False,
-    )
+def plot_latency_vs_throughput_logy(groups, traffic, outdir, dpi, ymin):
+    reuse_figure((12, 7))
+    plot_lines_by(groups, "Throughput", "AvgTotalLatency")
     plt.title(
         f"Latency vs Throughput (log-y) — {traffic}",
         fontsize=16,
@@ -439,45 +307,88 @@ def plot_latency_vs_throughput_logy(df, traffic, outdir, dpi):
     )
     plt.xlabel("Throughput (accepted pkts/node/cycle)")
     plt.ylabel("Average Packet Latency (cycles)")
-    ymin = max(
-        1e-3, float(np.nanmin(df["AvgTotalLatency"].replace(0, np.nan)))
-    )
     plt.yscale("log")
     plt.ylim(bottom=ymin)
     plt.grid(True, which="both", linestyle="--", alpha=0.4)
     plt.legend(title="Topology")
     
     fn = os.path.join(
-        outdir, f"latency_vs_throughput_{safe_name(traffic)}_logy.png"
+        outdir, f"latency_vs_throughput_{safe_name(traffic)}_logy.{FIG_FORMAT}"
     )
     plt.savefig(fn, dpi=dpi, bbox_inches="tight")
     if SHOW:
         plt.show()
-    plt.close()
     return fn
 
 
+def plot_by_traffic(df, traffic, outdir, dpi, knee_map):
+    """All per-traffic figures (topologies as hue), from a single split of df
+    per topology and one log-axis floor per metric; knee_map is
+    (traffic, topology) -> knee injection rate. Returns the file names."""
+    groups = split_arrays(df, "Topology")
+    ymin_tp = log_ymin(df["Throughput"], 1e-6)
+    ymin_lat = log_ymin(df["AvgTotalLatency"], 1e-3)
+    return [
+        plot_throughput_vs_injection(groups, traffic, outdir, dpi),
+        plot_throughput_vs_injection_logy(
+            groups, traffic, outdir, dpi, ymin_tp
+        ),
+        plot_latency_vs_injection(groups, traffic, outdir, dpi, knee_map),
+        plot_latency_vs_injection_logy(
+            groups, traffic, outdir, dpi, ymin_lat
+        ),
+        plot_latency_vs_throughput(groups, traffic, outdir, dpi),
+        plot_latency_vs_throughput_logy(
+            groups, traffic, outdir, dpi, ymin_lat
+        ),
+    ]
+
+
 def facet_throughput_vs_injection(df, outdir, dpi):
-    g = sns.FacetGrid(
-        df,
-        col="Traffic",
-        hue="Topology",
+    # One panel per traffic, topologies as hue with the same colour in
+    # every panel (the layout sns.FacetGrid used to build)
+    by_traffic = list(df.groupby("Traffic", observed=True))
+    topologies = list(df.groupby("Topology", observed=True).groups)
+    colors = dict(
+        zip(topologies, sns.color_palette(n_colors=len(topologies)))
+    )
+    fig, axes = plt.subplots(
+        1,
+        len(by_traffic),
+        figsize=(4 * 1.2 * len(by_traffic), 4),
         sharex=True,
         sharey=True,
-        height=4,
-        aspect=1.2,
-    )
-    g.map_dataframe(
-        sns.lineplot, x="InjectionRate", y="Throughput", marker="o"
-    )
-    g.add_legend(title="Topology")
-    g.set_axis_labels("Injection Rate", "Throughput")
-    g.set_titles(col_template="{col_name}")
-    
-    for ax in g.axes.flat:
+        squeeze=False,
+    )
+    for ax, (traffic, g) in zip(axes.flat, by_traffic):
+        plot_lines_by(
+            split_arrays(g, "Topology"),
+            "InjectionRate",
+            "Throughput",
+            ax=ax,
+            colors=colors,
+            marker="o",
+        )
+        ax.set_title(traffic)
+        ax.set_xlabel("Injection Rate")
         ax.grid(True, linestyle="--", alpha=0.4)
-    
-    fn = os.path.join(outdir, "facet_throughput_vs_injection.png")
+    axes[0, 0].set_ylabel("Throughput")
+
+    handles = {}
+    for ax in axes.flat:
+        for h, label in zip(*ax.get_legend_handles_labels()):
+            handles.setdefault(label, h)
+    fig.legend(
+        [handles[t] for t in topologies if t in handles],
+        [t for t in topologies if t in handles],
+        title="Topology",
+        loc="center left",
+        bbox_to_anchor=(1.0, 0.5),
+        frameon=False,
+    )
+    fig.tight_layout()
+
+    fn = os.path.join(outdir, f"facet_throughput_vs_injection.{FIG_FORMAT}")
     plt.savefig(fn, dpi=dpi, bbox_inches="tight")
     if SHOW:
         plt.show()
@@ -510,7 +421,7 @@ def plot_peak_tp_heatmap(summary_df, outdir, dpi):
     plt.ylabel("Topology")
     plt.xlabel("Traffic")
     
-    fn = os.path.join(outdir, "peak_throughput_heatmap.png")
+    fn = os.path.join(outdir, f"peak_throughput_heatmap.{FIG_FORMAT}")
     plt.savefig(fn, dpi=dpi, bbox_inches="tight")
     if SHOW:
         plt.show()
@@ -543,7 +454,7 @@ def plot_knee_heatmap(summary_df, outdir, dpi):
     plt.ylabel("Topology")
     plt.xlabel("Traffic")
     
-    fn = os.path.join(outdir, "knee_injection_rate_heatmap.png")
+    fn = os.path.join(outdir, f"knee_injection_rate_heatmap.{FIG_FORMAT}")
     plt.savefig(fn, dpi=dpi, bbox_inches="tight")
     if SHOW:
         plt.show()
@@ -551,15 +462,56 @@ def plot_knee_heatmap(summary_df, outdir, dpi):
     return fn
 
 
+def set_style():
+    sns.set_theme(style="whitegrid", palette="deep")
+
+
+def _init_plot_worker():
+    # workers only write files, and may not have inherited the style
+    global plt, sns
+    plt, sns = import_plotting(SHOW)
+    plt.switch_backend("Agg")
+    set_style()
+
+
+def _plot_task(task):
+    plot_fn, *args = task
+    return plot_fn(*args)
+
+
+def plot_aggregates(df, summary_df, outdir, dpi):
+    return [
+        facet_throughput_vs_injection(df, outdir, dpi),
+        plot_peak_tp_heatmap(summary_df, outdir, dpi),
+        plot_knee_heatmap(summary_df, outdir, dpi),
+    ]
+
+
+def run_plot_tasks(tasks):
+    """Run (plot_fn, *args) tasks, each returning a list of file names, and
+    return all names in task order.
+
+    The figures are independent and rendering / PNG encoding is CPU-bound,
+    so they go to a process pool, except with SHOW (windows must open in
+    this process) or when there is nothing to run in parallel.
+    """
+    workers = min(len(tasks), os.cpu_count() or 1)
+    if SHOW or workers < 2:
+        results = map(_plot_task, tasks)
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_plot_worker
+        ) as ex:
+            results = list(ex.map(_plot_task, tasks))
+    return [fn for files in results for fn in files]
+
+
 def main():
     os.makedirs(OUTDIR, exist_ok=True)
     
-    # Style
-    sns.set_theme(style="whitegrid", palette="deep")
-    
     # Load CSV (assumes header row exists)
     try:
-        df = pd.read_csv(CSV_FILE)
+        df = load_csv(CSV_FILE)
     except FileNotFoundError:
         print(f"Error: File not found: {CSV_FILE}")
         sys.exit(1)
@@ -571,39 +523,47 @@ def main():
     if df.empty:
         print("No data after filtering. Check CSV/filters.")
         sys.exit(0)
+
+    # Style
+    global plt, sns
+    plt, sns = import_plotting(SHOW)
+    set_style()
+
+    # Topology / Traffic are low-cardinality labels that every groupby below
+    # keys on; as categoricals they are grouped and sorted by integer code
+    df = df.astype({"Topology": "category", "Traffic": "category"})
     
-    # Sort for nice lines
-    df = df.sort_values(["Traffic", "Topology", "InjectionRate"]).reset_index(
-        drop=True
-    )
+    # Sort for nice lines; summarize() and the plots take each group's rows
+    # in this (stable) order as is
+    df = df.sort_values(
+        ["Traffic", "Topology", "InjectionRate"], kind="stable"
+    ).reset_index(drop=True)
     
     # Summary metrics & save
     summary_df = summarize(df, knee_factor=KNEE_FACTOR)
     summary_path = os.path.join(OUTDIR, "results_summary.csv")
     summary_df.to_csv(summary_path, index=False)
+    # (traffic, topology) -> knee, for the latency plot annotations
+    knee_map = summary_df.set_index(["Traffic", "Topology"])[
+        "KneeInjectionRate"
+    ].to_dict()
     
     saved = []
     
-    # Per-traffic comparison (topologies as hue) - EXISTING PLOTS
-    for traffic, g in df.groupby("Traffic", sort=True):
-        saved.append(plot_throughput_vs_injection(g, traffic, OUTDIR, DPI))
-        saved.append(
-            plot_throughput_vs_injection_logy(g, traffic, OUTDIR, DPI)
-        )
-        saved.append(plot_latency_vs_injection(g, traffic, OUTDIR, DPI))
-        saved.append(plot_latency_vs_injection_logy(g, traffic, OUTDIR, DPI))
-        saved.append(plot_latency_vs_throughput(g, traffic, OUTDIR, DPI))
-        saved.append(plot_latency_vs_throughput_logy(g, traffic, OUTDIR, DPI))
-    
-    # NEW: Per-topology comparison (traffic patterns as hue)
-    for topology, g in df.groupby("Topology", sort=True):
-        saved.append(plot_inj_rate_vs_throughput_by_topology(g, topology, OUTDIR, DPI))
-        saved.append(plot_throughput_vs_latency_by_topology(g, topology, OUTDIR, DPI))
-    
+    # Per-traffic comparison (topologies as hue) - EXISTING PLOTS, and
+    # NEW: per-topology comparison (traffic patterns as hue); one task per
+    # traffic / topology
+    tasks = [
+        (plot_by_traffic, g, traffic, OUTDIR, DPI, knee_map)
+        for traffic, g in df.groupby("Traffic", sort=True, observed=True)
+    ]
+    tasks += [
+        (plot_by_topology, g, topology, OUTDIR, DPI)
+        for topology, g in df.groupby("Topology", sort=True, observed=True)
+    ]
     # Aggregated visuals
-    saved.append(facet_throughput_vs_injection(df, OUTDIR, DPI))
-    saved.append(plot_peak_tp_heatmap(summary_df, OUTDIR, DPI))
-    saved.append(plot_knee_heatmap(summary_df, OUTDIR, DPI))
+    tasks.append((plot_aggregates, df, summary_df, OUTDIR, DPI))
+    saved += run_plot_tasks(tasks)
     
     print("\n=== Saved Figures ===")
     for s in saved:
@@ -612,7 +572,7 @@ def main():
     
     # Quick highlights: best topology per traffic
     print("\n=== Peak Throughput by Traffic/Topology ===")
-    for traffic, g in summary_df.groupby("Traffic"):
+    for traffic, g in summary_df.groupby("Traffic", observed=True):
         best = g.sort_values("PeakThroughput", ascending=False).iloc[0]
         knee = (
             f"{best.KneeInjectionRate:.3f}"
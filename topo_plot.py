@@ -19,11 +19,18 @@ import os
 import sys
 import math
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 import warnings
 
+from plot_helpers import (
+    ensure_columns,
+    import_plotting,
+    load_csv,
+    log_ymin,
+    safe_name,
+    summarize,
+    to_numeric,
+)
+
 # ============================== CONFIG ======================================
 CSV_FILE = "./lab4/sec2/results.csv"
 OUTDIR = "./lab4/sec2/plots"
@@ -40,57 +47,9 @@ FILTER_TOPOLOGY = None  # e.g., ["Mesh_XY", "Torus_XY"]
 SHOW = False
 # ============================================================================
 
-
-def ensure_columns(df: pd.DataFrame) -> pd.DataFrame:
-    df.columns = [c.strip() for c in df.columns]
-    # Backward-compat column aliases
-    rename_map = {}
-    if "SentPackets" in df.columns and "PacketsInjected" not in df.columns:
-        rename_map["SentPackets"] = "PacketsInjected"
-    if "ReceivedPackets" in df.columns and "PacketsReceived" not in df.columns:
-        rename_map["ReceivedPackets"] = "PacketsReceived"
-    if (
-        "AvgPacketLatency" in df.columns
-        and "AvgTotalLatency" not in df.columns
-    ):
-        rename_map["AvgPacketLatency"] = "AvgTotalLatency"
-    if rename_map:
-        df = df.rename(columns=rename_map)
-
-    if "Topology" not in df.columns:
-        # If older CSVs didn’t include topology, assume Mesh_XY to keep plotting usable
-        df["Topology"] = "Mesh_XY"
-
-    required = [
-        "Topology",
-        "Traffic",
-        "InjectionRate",
-        "Throughput",
-        "PacketsInjected",
-        "PacketsReceived",
-        "AvgTotalLatency",
-        "AvgHops",
-    ]
-    missing = [c for c in required if c not in df.columns]
-    if missing:
-        raise ValueError(
-            f"CSV missing columns: {missing}\nFound: {list(df.columns)}"
-        )
-    return df
-
-
-def to_numeric(df: pd.DataFrame) -> pd.DataFrame:
-    for col in [
-        "InjectionRate",
-        "Throughput",
-        "PacketsInjected",
-        "PacketsReceived",
-        "AvgTotalLatency",
-        "AvgHops",
-    ]:
-        df[col] = pd.to_numeric(df[col], errors="coerce")
-    df = df.dropna(subset=["InjectionRate", "Throughput", "AvgTotalLatency"])
-    return df
+# matplotlib.pyplot / seaborn, set from import_plotting() once there is data
+plt = None
+sns = None
 
 
 def maybe_filter(df: pd.DataFrame) -> pd.DataFrame:
@@ -103,44 +62,6 @@ def maybe_filter(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def safe_name(s: str) -> str:
-    return str(s).replace(" ", "_").replace("/", "_")
-
-
-def summarize(df: pd.DataFrame, knee_factor: float) -> pd.DataFrame:
-    rows = []
-    for (traffic, topo), g in df.groupby(["Traffic", "Topology"], sort=True):
-        g = g.sort_values("InjectionRate")
-        # Peak throughput
-        idx_peak = g["Throughput"].idxmax()
-        peak_tp = g.loc[idx_peak, "Throughput"]
-        inj_at_peak = g.loc[idx_peak, "InjectionRate"]
-        # Low-load latency at min inj
-        min_inj = g["InjectionRate"].min()
-        low_latency = g.loc[g["InjectionRate"].idxmin(), "AvgTotalLatency"]
-        # Knee
-        knee_thresh = low_latency * knee_factor
-        knee_rows = g[g["AvgTotalLatency"] >= knee_thresh]
-        knee_inj = (
-            knee_rows["InjectionRate"].min() if not knee_rows.empty else np.nan
-        )
-        rows.append(
-            {
-                "Traffic": traffic,
-                "Topology": topo,
-                "PeakThroughput": peak_tp,
-                "InjectionAtPeakTP": inj_at_peak,
-                "LowLoadInjection": float(min_inj),
-                "LowLoadLatency": float(low_latency),
-                "KneeFactor": knee_factor,
-                "KneeInjectionRate": (
-                    float(knee_inj) if not pd.isna(knee_inj) else np.nan
-                ),
-            }
-        )
-    return pd.DataFrame(rows).sort_values(["Traffic", "Topology"])
-
-
 def plot_throughput_vs_injection(df, traffic, outdir, dpi):
     plt.figure(figsize=(8, 6))
     sns.lineplot(
@@ -194,9 +115,9 @@ def plot_latency_vs_injection(df, traffic, outdir, dpi):
     plt.legend(title="Topology")
     # Annotate knee (first inj where latency >= 2x low-load)
     try:
-        for topo, g in df.groupby("Topology"):
-            g = g.sort_values("InjectionRate")
-            low = g.loc[g["InjectionRate"].idxmin(), "AvgTotalLatency"]
+        for topo, g in df.groupby("Topology", observed=True):
+            # rows come sorted by InjectionRate (see main())
+            low = g["AvgTotalLatency"].iat[0]
             thresh = low * KNEE_FACTOR
             knees = g[g["AvgTotalLatency"] >= thresh]
             if not knees.empty:
@@ -256,7 +177,7 @@ def plot_latency_vs_throughput(df, traffic, outdir, dpi):
     return fn
 
 
-def plot_throughput_vs_injection_logy(df, traffic, outdir, dpi):
+def plot_throughput_vs_injection_logy(df, traffic, outdir, dpi, ymin):
     plt.figure(figsize=(8, 6))
     sns.lineplot(
         data=df,
@@ -274,7 +195,6 @@ def plot_throughput_vs_injection_logy(df, traffic, outdir, dpi):
     )
     plt.xlabel("Injection Rate (pkts/node/cycle)")
     plt.ylabel("Throughput (accepted pkts/node/cycle)")
-    ymin = max(1e-6, float(np.nanmin(df["Throughput"].replace(0, np.nan))))
     plt.yscale("log")
     plt.ylim(bottom=ymin)
     plt.grid(True, which="both", linestyle="--", alpha=0.4)
@@ -289,7 +209,7 @@ def plot_throughput_vs_injection_logy(df, traffic, outdir, dpi):
     return fn
 
 
-def plot_latency_vs_injection_logy(df, traffic, outdir, dpi):
+def plot_latency_vs_injection_logy(df, traffic, outdir, dpi, ymin):
     plt.figure(figsize=(8, 6))
     sns.lineplot(
         data=df,
@@ -307,9 +227,6 @@ def plot_latency_vs_injection_logy(df, traffic, outdir, dpi):
     )
     plt.xlabel("Injection Rate (pkts/node/cycle)")
     plt.ylabel("Average Packet Latency (cycles)")
-    ymin = max(
-        1e-3, float(np.nanmin(df["AvgTotalLatency"].replace(0, np.nan)))
-    )
     plt.yscale("log")
     plt.ylim(bottom=ymin)
     plt.grid(True, which="both", linestyle="--", alpha=0.4)
@@ -324,7 +241,7 @@ def plot_latency_vs_injection_logy(df, traffic, outdir, dpi):
     return fn
 
 
-def plot_latency_vs_throughput_logy(df, traffic, outdir, dpi):
+def plot_latency_vs_throughput_logy(df, traffic, outdir, dpi, ymin):
     plt.figure(figsize=(8, 6))
     sns.lineplot(
         data=df,
@@ -342,9 +259,6 @@ def plot_latency_vs_throughput_logy(df, traffic, outdir, dpi):
     )
     plt.xlabel("Throughput (accepted pkts/node/cycle)")
     plt.ylabel("Average Packet Latency (cycles)")
-    ymin = max(
-        1e-3, float(np.nanmin(df["AvgTotalLatency"].replace(0, np.nan)))
-    )
     plt.yscale("log")
     plt.ylim(bottom=ymin)
     plt.grid(True, which="both", linestyle="--", alpha=0.4)
@@ -452,12 +366,9 @@ def plot_knee_heatmap(summary_df, outdir, dpi):
 def main():
     os.makedirs(OUTDIR, exist_ok=True)
 
-    # Style
-    sns.set_theme(style="whitegrid", palette="deep")
-
     # Load CSV (assumes header row exists)
     try:
-        df = pd.read_csv(CSV_FILE)
+        df = load_csv(CSV_FILE)
     except FileNotFoundError:
         print(f"Error: File not found: {CSV_FILE}")
         sys.exit(1)
@@ -470,10 +381,20 @@ def main():
         print("No data after filtering. Check CSV/filters.")
         sys.exit(0)
 
-    # Sort for nice lines
-    df = df.sort_values(["Traffic", "Topology", "InjectionRate"]).reset_index(
-        drop=True
-    )
+    # Style
+    global plt, sns
+    plt, sns = import_plotting(SHOW)
+    sns.set_theme(style="whitegrid", palette="deep")
+
+    # Topology / Traffic are low-cardinality labels that every groupby below
+    # keys on; as categoricals they are grouped and sorted by integer code
+    df = df.astype({"Topology": "category", "Traffic": "category"})
+
+    # Sort for nice lines; summarize() and the plots take each group's rows
+    # in this (stable) order as is
+    df = df.sort_values(
+        ["Traffic", "Topology", "InjectionRate"], kind="stable"
+    ).reset_index(drop=True)
 
     # Summary metrics & save
     summary_df = summarize(df, knee_factor=KNEE_FACTOR)
@@ -483,15 +404,24 @@ def main():
     saved = []
 
     # Per-traffic comparison (topologies as hue)
-    for traffic, g in df.groupby("Traffic", sort=True):
+    for traffic, g in df.groupby("Traffic", sort=True, observed=True):
+        # keep topologies without runs for this traffic out of the legends
+        g = g.assign(Topology=g["Topology"].cat.remove_unused_categories())
+        # log-axis floors, shared by the log-y variants of this traffic
+        ymin_tp = log_ymin(g["Throughput"], 1e-6)
+        ymin_lat = log_ymin(g["AvgTotalLatency"], 1e-3)
         saved.append(plot_throughput_vs_injection(g, traffic, OUTDIR, DPI))
         saved.append(
-            plot_throughput_vs_injection_logy(g, traffic, OUTDIR, DPI)
+            plot_throughput_vs_injection_logy(g, traffic, OUTDIR, DPI, ymin_tp)
         )
         saved.append(plot_latency_vs_injection(g, traffic, OUTDIR, DPI))
-        saved.append(plot_latency_vs_injection_logy(g, traffic, OUTDIR, DPI))
+        saved.append(
+            plot_latency_vs_injection_logy(g, traffic, OUTDIR, DPI, ymin_lat)
+        )
         saved.append(plot_latency_vs_throughput(g, traffic, OUTDIR, DPI))
-        saved.append(plot_latency_vs_throughput_logy(g, traffic, OUTDIR, DPI))
+        saved.append(
+            plot_latency_vs_throughput_logy(g, traffic, OUTDIR, DPI, ymin_lat)
+        )
 
     # Aggregated visuals
     saved.append(facet_throughput_vs_injection(df, OUTDIR, DPI))
@@ -505,7 +435,7 @@ def main():
 
     # Quick highlights: best topology per traffic
     print("\n=== Peak Throughput by Traffic/Topology ===")
-    for traffic, g in summary_df.groupby("Traffic"):
+    for traffic, g in summary_df.groupby("Traffic", observed=True):
         best = g.sort_values("PeakThroughput", ascending=False).iloc[0]
         knee = (
             f"{best.KneeInjectionRate:.3f}"
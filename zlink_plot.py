@@ -4,7 +4,8 @@ Plot curves from Z-link TSV sweeps and support different topologies.
 
 Usage:
   python3 zlink_plot.py [csv_path] [out_dir] [--match REGEX] [--traffic NAME]
-                        [--per-topo]
+                        [--per-topo] [--dpi N] [--format png|svg|pdf]
+                        [--log-threshold X]
 
 Examples:
   # Use defaults that match zlink.sh
@@ -19,6 +20,10 @@ Examples:
   # Plot per base-topology figures for a given traffic
   python3 zlink_plot.py results.csv plots --per-topo --traffic uniform_random
 
+  # Quick look: lower-resolution PNGs, or vector SVGs (no raster encode)
+  python3 zlink_plot.py --dpi 120
+  python3 zlink_plot.py --format svg
+
 Input CSV schema (header row required):
   Topology,Traffic,InjectionRate,Throughput,PacketsInjected,PacketsReceived,AvgTotalLatency,AvgHops
 
@@ -26,6 +31,10 @@ Notes:
 - This script assumes the sweep driver is `zlink.sh` located next to this file.
 - With no arguments, it looks for CSV at: ./lab4/sparse3d_tsv/results.csv
   and writes plots to: ./lab4/sparse3d_tsv/plots
+- Figures are written as 300 dpi PNGs unless --dpi / --format say otherwise.
+- A log-y variant is only written when its data spans at least
+  --log-threshold (default 5) times from smallest to largest positive value;
+  below that it would look like the linear plot. 0 always writes it.
 
 By convention, the 'Topology' field can include a Z-latency tag, e.g.:
   Sparse3D_Pillars_Z1, Sparse3D_Pillars_Z2, Sparse3D_Pillars_Z4,
@@ -39,9 +48,10 @@ import re
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-import numpy as np
 from typing import Tuple, Optional
 
+from plot_helpers import load_csv, log_ymin, plot_lines_by, split_arrays
+
 
 # Built-in paths relative to this script
 HERE = os.path.dirname(os.path.abspath(__file__))
@@ -49,12 +59,31 @@ ZLINK_SH = os.path.join(HERE, "zlink.sh")
 DEFAULT_RESULTS_DIR = os.path.join(HERE, "lab4", "sparse3d_tsv")
 DEFAULT_CSV = os.path.join(DEFAULT_RESULTS_DIR, "results.csv")
 DEFAULT_PLOT_DIR = os.path.join(DEFAULT_RESULTS_DIR, "plots")
+DEFAULT_DPI = 300
+DEFAULT_LOG_THRESHOLD = 5.0
+FIG_FORMATS = ("png", "svg", "pdf")
+
+# Flags that take the next argument as their value
+VALUE_FLAGS = ("--match", "--traffic", "--dpi", "--format", "--log-threshold")
+
+# Runs of characters _sanitize() replaces with "_" in output file names
+_UNSAFE_FILENAME_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+# CSV columns this script reads (the rest of the sweep schema is skipped)
+ZLINK_COLUMNS = (
+    "Topology",
+    "Traffic",
+    "InjectionRate",
+    "Throughput",
+    "AvgTotalLatency",
+)
 
 
 def resolve_paths_and_args(
     argv: list,
-) -> Tuple[str, str, Optional[str], Optional[str], bool]:
-    """Parse arguments and return (csv_path, out_dir, match_regex, traffic, per_topo)."""
+) -> Tuple[str, str, Optional[str], Optional[str], bool, int, str, float]:
+    """Parse arguments and return (csv_path, out_dir, match_regex, traffic,
+    per_topo, dpi, fig_format, log_threshold)."""
     # Very small argparse replacement to keep the script lightweight and
     # backward-compatible with previous positional-only usage.
     csv_path = DEFAULT_CSV
@@ -62,13 +91,21 @@ def resolve_paths_and_args(
     match_regex: Optional[str] = None
     traffic: Optional[str] = None
     per_topo = False
+    dpi = DEFAULT_DPI
+    fig_format = "png"
+    log_threshold = DEFAULT_LOG_THRESHOLD
 
-    # Collect flags first
+    # Collect flags (with their values) first
     flags = []
     pos = []
-    for a in argv[1:]:
+    args = iter(argv[1:])
+    for a in args:
         if a.startswith("--"):
             flags.append(a)
+            if a in VALUE_FLAGS:
+                value = next(args, None)
+                if value is not None:
+                    flags.append(value)
         else:
             pos.append(a)
 
@@ -79,7 +116,7 @@ def resolve_paths_and_args(
         csv_path, out_dir = pos
     else:
         print(
-            "Usage: python3 zlink_plot.py [csv_path] [out_dir] [--match REGEX] [--traffic NAME] [--per-topo]",
+            "Usage: python3 zlink_plot.py [csv_path] [out_dir] [--match REGEX] [--traffic NAME] [--per-topo] [--dpi N] [--format png|svg|pdf] [--log-threshold X]",
             file=sys.stderr,
         )
         sys.exit(1)
@@ -111,10 +148,56 @@ def resolve_paths_and_args(
             traffic = flags[i + 1]
             i += 2
             continue
+        if f == "--dpi":
+            try:
+                dpi = int(flags[i + 1]) if i + 1 < len(flags) else 0
+            except ValueError:
+                dpi = 0
+            if dpi <= 0:
+                print(
+                    "ERROR: --dpi requires a positive integer", file=sys.stderr
+                )
+                sys.exit(1)
+            i += 2
+            continue
+        if f == "--format":
+            if i + 1 >= len(flags) or flags[i + 1] not in FIG_FORMATS:
+                print(
+                    f"ERROR: --format requires one of {', '.join(FIG_FORMATS)}",
+                    file=sys.stderr,
+                )
+                sys.exit(1)
+            fig_format = flags[i + 1]
+            i += 2
+            continue
+        if f == "--log-threshold":
+            try:
+                log_threshold = (
+                    float(flags[i + 1]) if i + 1 < len(flags) else -1.0
+                )
+            except ValueError:
+                log_threshold = -1.0
+            if not log_threshold >= 0:
+                print(
+                    "ERROR: --log-threshold requires a number >= 0",
+                    file=sys.stderr,
+                )
+                sys.exit(1)
+            i += 2
+            continue
         print(f"ERROR: Unknown flag {f}", file=sys.stderr)
         sys.exit(1)
 
-    return csv_path, out_dir, match_regex, traffic, per_topo
+    return (
+        csv_path,
+        out_dir,
+        match_regex,
+        traffic,
+        per_topo,
+        dpi,
+        fig_format,
+        log_threshold,
+    )
 
 
 def main():
@@ -124,11 +207,30 @@ def main():
         match_regex,
         opt_traffic,
         per_topo,
+        dpi,
+        fig_format,
+        log_threshold,
     ) = resolve_paths_and_args(sys.argv)
 
-    if not os.path.exists(csv_path):
+    # Compile --match once, so a bad pattern fails before the CSV is read
+    match_pat = None
+    if match_regex:
+        try:
+            match_pat = re.compile(match_regex)
+        except re.error as e:
+            print(f"ERROR: invalid --match regex: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    # Checked once; used for the missing-CSV hint and the closing summary
+    have_zlink_sh = os.path.isfile(ZLINK_SH)
+
+    # Only the columns plotted here are parsed (typed, not cached); opening
+    # the file doubles as the existence check
+    try:
+        df = load_csv(csv_path, ZLINK_COLUMNS)
+    except FileNotFoundError:
         print(f"ERROR: CSV not found at: {csv_path}", file=sys.stderr)
-        if os.path.isfile(ZLINK_SH):
+        if have_zlink_sh:
             print(
                 f"Hint: generate it by running the sweep: {ZLINK_SH}",
                 file=sys.stderr,
@@ -141,29 +243,30 @@ def main():
         sys.exit(1)
 
     os.makedirs(out_dir, exist_ok=True)
-
-    df = pd.read_csv(csv_path)
     # Basic cleaning
     df.columns = [c.strip() for c in df.columns]
     for col in ["InjectionRate", "Throughput", "AvgTotalLatency"]:
-        if col in df.columns:
+        if col in df.columns and not pd.api.types.is_numeric_dtype(df[col]):
             df[col] = pd.to_numeric(df[col], errors="coerce")
     df = df.dropna(subset=["InjectionRate", "Throughput", "AvgTotalLatency", "Topology"])  # type: ignore
 
-    # Derive base topology (strip trailing _Z<d+>) and Z tag if present
-    df["base_topo"] = df["Topology"].str.replace(r"_Z\d+$", "", regex=True)
-    z_series = df["Topology"].str.extract(r"_Z(\d+)$")[0]
-    df["z_tag"] = z_series.where(~z_series.isna(), other="NA")
+    # Derive base topology (strip trailing _Z<d+>) and Z tag if present,
+    # from one split at the last "_Z" instead of separate regex passes
+    parts = (
+        df["Topology"]
+        .str.rsplit("_Z", n=1, expand=True)
+        .reindex(columns=[0, 1], fill_value="")
+    )
+    # rows without "_Z" have no second part (None)
+    has_z = parts[1].str.isdigit().eq(True)
+    df["base_topo"] = parts[0].where(has_z, df["Topology"])
+    df["z_tag"] = parts[1].where(has_z, "NA")
 
     # Filter by regex if provided, else default to any topology with a Z tag
-    if match_regex:
-        try:
-            df = df[df["Topology"].str.contains(match_regex, regex=True)]
-        except re.error as e:
-            print(f"ERROR: invalid --match regex: {e}", file=sys.stderr)
-            sys.exit(1)
+    if match_pat is not None:
+        df = df[df["Topology"].str.contains(match_pat)]
     else:
-        df = df[df["Topology"].str.contains(r"_Z\d+$", regex=True)]
+        df = df[has_z]
 
     if df.empty:
         print(
@@ -172,6 +275,17 @@ def main():
         )
         sys.exit(0)
 
+    # Low-cardinality labels that the traffic filter and the groupbys below
+    # key on; as categoricals they compare and group by integer code
+    df = df.astype(
+        {
+            "Topology": "category",
+            "Traffic": "category",
+            "base_topo": "category",
+            "z_tag": "category",
+        }
+    )
+
     # Traffic selection
     traffic: str
     if opt_traffic is not None:
@@ -207,7 +321,7 @@ def main():
 
     # Helpers for labeling, titles, and filename tagging
     def _sanitize(s: str) -> str:
-        return re.sub(r"[^A-Za-z0-9_.-]+", "_", s)
+        return _UNSAFE_FILENAME_RE.sub("_", s)
 
     def _label_for_combined(topo: str) -> str:
         return topo
@@ -215,19 +329,12 @@ def main():
     def _label_for_per_topo(z: str) -> str:
         return f"Z{z}"
 
+    # White-edged markers, as sns.lineplot(marker=...) draws them
+    marker_kws = dict(markeredgecolor="w", markeredgewidth=0.75)
+
     # 1) Throughput vs InjectionRate (linear)
     def _plot_throughput(ax, groups, xcol="InjectionRate", ycol="Throughput"):
-        for label, g in groups:
-            g = g.sort_values([xcol])
-            sns.lineplot(
-                data=g,
-                x=xcol,
-                y=ycol,
-                ax=ax,
-                label=label,
-                marker="o",
-                dashes=False,
-            )
+        plot_lines_by(groups, xcol, ycol, ax=ax, marker="o", **marker_kws)
         ax.set_xlabel("Injection Rate (pkts/node/cycle)")
         ax.set_ylabel("Throughput (accepted pkts/node/cycle)")
         ax.grid(True, linestyle="--", alpha=0.4)
@@ -237,17 +344,7 @@ def main():
     def _plot_latency(
         ax, groups, xcol="InjectionRate", ycol="AvgTotalLatency"
     ):
-        for label, g in groups:
-            g = g.sort_values([xcol])
-            sns.lineplot(
-                data=g,
-                x=xcol,
-                y=ycol,
-                ax=ax,
-                label=label,
-                marker="s",
-                dashes=False,
-            )
+        plot_lines_by(groups, xcol, ycol, ax=ax, marker="s", **marker_kws)
         ax.set_xlabel("Injection Rate (pkts/node/cycle)")
         ax.set_ylabel("Average Packet Latency (cycles)")
         ax.set_ylim(bottom=0)
@@ -258,17 +355,7 @@ def main():
     def _plot_latency_vs_tp(
         ax, groups, xcol="Throughput", ycol="AvgTotalLatency"
     ):
-        for label, g in groups:
-            g = g.sort_values([xcol])
-            sns.lineplot(
-                data=g,
-                x=xcol,
-                y=ycol,
-                ax=ax,
-                label=label,
-                marker="d",
-                dashes=False,
-            )
+        plot_lines_by(groups, xcol, ycol, ax=ax, marker="d", **marker_kws)
         ax.set_xlabel("Throughput (accepted pkts/node/cycle)")
         ax.set_ylabel("Average Packet Latency (cycles)")
         ax.set_ylim(bottom=0)
@@ -277,207 +364,115 @@ def main():
 
     saved_paths = []
 
-    if per_topo:
-        # Generate separate figures per base topology; legend shows Z tags
-        for base in sorted(df_t["base_topo"].unique()):
-            df_b = df_t[df_t["base_topo"] == base]
-            if df_b.empty:
-                continue
-
-            groups_tp = [
-                (_label_for_per_topo(z), g) for z, g in df_b.groupby("z_tag")
-            ]
-
-            # Throughput vs Injection (linear)
-            fig, ax = plt.subplots(figsize=(8, 6))
-            _plot_throughput(ax, groups_tp)
+    # All figures share one size: draw each on the same axes, cleared in
+    # between, instead of building a new figure per PNG. The saved area is
+    # still fitted to the content (bbox_inches="tight"), since the combined
+    # mode's "Topologies:" title can be wider than the figure
+    fig, ax = plt.subplots(figsize=(8, 6))
+    save_kws = dict(dpi=dpi, bbox_inches="tight", format=fig_format)
+    if fig_format == "svg":
+        # no timestamp, so unchanged data gives unchanged files
+        save_kws["metadata"] = {"Date": None}
+
+    def _wants_logy(values, ymin):
+        """Whether values reach log_threshold times the log-axis floor ymin;
+        below that the log-y plot just repeats the linear one."""
+        return log_threshold <= 0 or values.max() >= log_threshold * ymin
+
+    def _save_panel(groups, df_p, prefix, subtitle, lvt_subtitle):
+        """Save the five figures of one panel (a base topology, or all
+        matching topologies) from its groups, split once by the caller."""
+
+        def _save(kind, title, subtitle=subtitle):
             ax.set_title(
-                f"Throughput vs Injection Rate — {traffic}\n{base} (Z-latency sweep)",
+                f"{title} — {traffic}{subtitle}",
                 fontsize=16,
                 fontweight="bold",
             )
-            out_tp = os.path.join(
-                out_dir,
-                f"{_sanitize(base)}_{_sanitize(traffic)}_throughput_vs_injection.png",
-            )
-            fig.savefig(out_tp, dpi=300, bbox_inches="tight")
-            plt.close(fig)
-            saved_paths.append(out_tp)
-
-            # Throughput vs Injection (log-y)
-            fig, ax = plt.subplots(figsize=(8, 6))
-            _plot_throughput(ax, groups_tp)
-            ymin = max(
-                1e-6, float(np.nanmin(df_b["Throughput"].replace(0, np.nan)))
-            )
+            out = os.path.join(out_dir, f"{prefix}{kind}.{fig_format}")
+            fig.savefig(out, **save_kws)
+            saved_paths.append(out)
+
+        # Throughput vs Injection (linear)
+        ax.cla()
+        _plot_throughput(ax, groups)
+        _save("throughput_vs_injection", "Throughput vs Injection Rate")
+
+        # Throughput vs Injection (log-y)
+        ymin = log_ymin(df_p["Throughput"], 1e-6)
+        if _wants_logy(df_p["Throughput"], ymin):
+            ax.cla()
+            _plot_throughput(ax, groups)
             ax.set_yscale("log")
             ax.set_ylim(bottom=ymin)
             ax.grid(True, which="both", linestyle="--", alpha=0.4)
-            ax.set_title(
-                f"Throughput vs Injection Rate (log-y) — {traffic}\n{base} (Z-latency sweep)",
-                fontsize=16,
-                fontweight="bold",
+            _save(
+                "throughput_vs_injection_logy",
+                "Throughput vs Injection Rate (log-y)",
             )
-            out_tp_logy = os.path.join(
-                out_dir,
-                f"{_sanitize(base)}_{_sanitize(traffic)}_throughput_vs_injection_logy.png",
-            )
-            fig.savefig(out_tp_logy, dpi=300, bbox_inches="tight")
-            plt.close(fig)
-            saved_paths.append(out_tp_logy)
 
-            # Latency vs Injection (linear)
-            fig, ax = plt.subplots(figsize=(8, 6))
-            _plot_latency(ax, groups_tp)
-            ax.set_title(
-                f"Latency vs Injection Rate — {traffic}\n{base} (Z-latency sweep)",
-                fontsize=16,
-                fontweight="bold",
-            )
-            out_lat = os.path.join(
-                out_dir,
-                f"{_sanitize(base)}_{_sanitize(traffic)}_latency_vs_injection.png",
-            )
-            fig.savefig(out_lat, dpi=300, bbox_inches="tight")
-            plt.close(fig)
-            saved_paths.append(out_lat)
-
-            # Latency vs Injection (log-y)
-            fig, ax = plt.subplots(figsize=(8, 6))
-            _plot_latency(ax, groups_tp)
-            ymin_lat = max(
-                1e-3,
-                float(np.nanmin(df_b["AvgTotalLatency"].replace(0, np.nan))),
-            )
+        # Latency vs Injection (linear)
+        ax.cla()
+        _plot_latency(ax, groups)
+        _save("latency_vs_injection", "Latency vs Injection Rate")
+
+        # Latency vs Injection (log-y)
+        ymin_lat = log_ymin(df_p["AvgTotalLatency"], 1e-3)
+        if _wants_logy(df_p["AvgTotalLatency"], ymin_lat):
+            ax.cla()
+            _plot_latency(ax, groups)
             ax.set_yscale("log")
             ax.set_ylim(bottom=ymin_lat)
             ax.grid(True, which="both", linestyle="--", alpha=0.4)
-            ax.set_title(
-                f"Latency vs Injection Rate (log-y) — {traffic}\n{base} (Z-latency sweep)",
-                fontsize=16,
-                fontweight="bold",
-            )
-            out_lat_logy = os.path.join(
-                out_dir,
-                f"{_sanitize(base)}_{_sanitize(traffic)}_latency_vs_injection_logy.png",
+            _save(
+                "latency_vs_injection_logy",
+                "Latency vs Injection Rate (log-y)",
             )
-            fig.savefig(out_lat_logy, dpi=300, bbox_inches="tight")
-            plt.close(fig)
-            saved_paths.append(out_lat_logy)
 
-            # Latency vs Throughput
-            fig, ax = plt.subplots(figsize=(8, 6))
-            _plot_latency_vs_tp(ax, groups_tp)
-            ax.set_title(
-                f"Latency vs Throughput — {traffic}\n{base} (Z-latency sweep)",
-                fontsize=16,
-                fontweight="bold",
-            )
-            out_lvt = os.path.join(
-                out_dir,
-                f"{_sanitize(base)}_{_sanitize(traffic)}_latency_vs_throughput.png",
+        # Latency vs Throughput
+        ax.cla()
+        _plot_latency_vs_tp(ax, groups)
+        _save(
+            "latency_vs_throughput",
+            "Latency vs Throughput",
+            subtitle if lvt_subtitle else "",
+        )
+
+    if per_topo:
+        # Generate separate figures per base topology; legend shows Z tags
+        for base, df_b in df_t.groupby("base_topo", sort=True, observed=True):
+            groups_tp = [
+                (_label_for_per_topo(z), g)
+                for z, g in split_arrays(df_b, "z_tag")
+            ]
+            _save_panel(
+                groups_tp,
+                df_b,
+                f"{_sanitize(base)}_{_sanitize(traffic)}_",
+                f"\n{base} (Z-latency sweep)",
+                lvt_subtitle=True,
             )
-            fig.savefig(out_lvt, dpi=300, bbox_inches="tight")
-            plt.close(fig)
-            saved_paths.append(out_lvt)
     else:
         # Combined figures across all matching topologies; legend shows full topology
         groups_all = [
             (_label_for_combined(topo), g)
-            for topo, g in df_t.groupby("Topology")
+            for topo, g in split_arrays(df_t, "Topology")
         ]
-
-        # Throughput vs Injection (linear)
-        fig, ax = plt.subplots(figsize=(8, 6))
-        _plot_throughput(ax, groups_all)
-        ax.set_title(
-            f"Throughput vs Injection Rate — {traffic}\nTopologies: {', '.join(sorted(df_t['base_topo'].unique()))}",
-            fontsize=16,
-            fontweight="bold",
+        topos = ", ".join(sorted(df_t["base_topo"].unique()))
+        _save_panel(
+            groups_all,
+            df_t,
+            "tsv_latency_sweep_",
+            f"\nTopologies: {topos}",
+            lvt_subtitle=False,
         )
-        out_tp = os.path.join(
-            out_dir, "tsv_latency_sweep_throughput_vs_injection.png"
-        )
-        fig.savefig(out_tp, dpi=300, bbox_inches="tight")
-        plt.close(fig)
-        saved_paths.append(out_tp)
 
-        # Throughput vs Injection (log-y)
-        fig, ax = plt.subplots(figsize=(8, 6))
-        _plot_throughput(ax, groups_all)
-        ymin = max(
-            1e-6, float(np.nanmin(df_t["Throughput"].replace(0, np.nan)))
-        )
-        ax.set_yscale("log")
-        ax.set_ylim(bottom=ymin)
-        ax.grid(True, which="both", linestyle="--", alpha=0.4)
-        ax.set_title(
-            f"Throughput vs Injection Rate (log-y) — {traffic}\nTopologies: {', '.join(sorted(df_t['base_topo'].unique()))}",
-            fontsize=16,
-            fontweight="bold",
-        )
-        out_tp_logy = os.path.join(
-            out_dir, "tsv_latency_sweep_throughput_vs_injection_logy.png"
-        )
-        fig.savefig(out_tp_logy, dpi=300, bbox_inches="tight")
-        plt.close(fig)
-        saved_paths.append(out_tp_logy)
-
-        # Latency vs Injection (linear)
-        fig, ax = plt.subplots(figsize=(8, 6))
-        _plot_latency(ax, groups_all)
-        ax.set_title(
-            f"Latency vs Injection Rate — {traffic}\nTopologies: {', '.join(sorted(df_t['base_topo'].unique()))}",
-            fontsize=16,
-            fontweight="bold",
-        )
-        out_lat = os.path.join(
-            out_dir, "tsv_latency_sweep_latency_vs_injection.png"
-        )
-        fig.savefig(out_lat, dpi=300, bbox_inches="tight")
-        plt.close(fig)
-        saved_paths.append(out_lat)
-
-        # Latency vs Injection (log-y)
-        fig, ax = plt.subplots(figsize=(8, 6))
-        _plot_latency(ax, groups_all)
-        ymin_lat = max(
-            1e-3, float(np.nanmin(df_t["AvgTotalLatency"].replace(0, np.nan)))
-        )
-        ax.set_yscale("log")
-        ax.set_ylim(bottom=ymin_lat)
-        ax.grid(True, which="both", linestyle="--", alpha=0.4)
-        ax.set_title(
-            f"Latency vs Injection Rate (log-y) — {traffic}\nTopologies: {', '.join(sorted(df_t['base_topo'].unique()))}",
-            fontsize=16,
-            fontweight="bold",
-        )
-        out_lat_logy = os.path.join(
-            out_dir, "tsv_latency_sweep_latency_vs_injection_logy.png"
-        )
-        fig.savefig(out_lat_logy, dpi=300, bbox_inches="tight")
-        plt.close(fig)
-        saved_paths.append(out_lat_logy)
-
-        # Latency vs Throughput
-        fig, ax = plt.subplots(figsize=(8, 6))
-        _plot_latency_vs_tp(ax, groups_all)
-        ax.set_title(
-            f"Latency vs Throughput — {traffic}",
-            fontsize=16,
-            fontweight="bold",
-        )
-        out_lvt = os.path.join(
-            out_dir, "tsv_latency_sweep_latency_vs_throughput.png"
-        )
-        fig.savefig(out_lvt, dpi=300, bbox_inches="tight")
-        plt.close(fig)
-        saved_paths.append(out_lvt)
+    plt.close(fig)
 
     print("Saved:")
     for p in saved_paths:
         print(p)
-    if os.path.isfile(ZLINK_SH):
+    if have_zlink_sh:
         print(f"Sweep script: {ZLINK_SH}")
 
 